@@ -1,26 +1,48 @@
 from __future__ import annotations
 
+import functools
 import hashlib
+import io
 import json
+import mmap
+import os
 import shutil
 import tarfile
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from concurrent.futures import as_completed
 from pathlib import Path
-from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple, Union
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Set, Tuple, Union
 
 import conda.api
 import conda.exports
 import conda_build.api
 import fsspec
+from conda.base.context import context
+from conda.core.subdir_data import create_cache_dir
 from pydantic import BaseModel
 from pydantic import Field
 
 from conda_replicate import CondaReplicateException
 from conda_replicate.adapters.package import CondaPackage
 from conda_replicate.adapters.subdir import get_known_subdirs
+from conda_replicate.group import groupby
+
+try:
+    import orjson  # optional, considerably faster parsing of large repodata
+except ImportError:  # pragma: no cover
+    orjson = None  # type: ignore
 
 _PATCH_GENERATOR_FILE = "patch_generator.tar.bz2"
 _INSTRUCTIONS_FILE = "patch_instructions.json"
 _REPODATA_FILE = "repodata.json"
+_DOWNLOAD_WORKERS = 8
+_CHUNK_SIZE = 2**20
+_PARTIAL_SUFFIX = ".partial"
+_VERIFIED_FILE = ".verified.json"
+_PACKAGE_EXTENSIONS = (".tar.bz2", ".conda")
+
+_json_loads = json.loads if orjson is None else orjson.loads
 
 PackageDict = Dict[str, Dict[str, Any]]
 
@@ -33,10 +55,12 @@ class CondaChannel:
     """
 
     def __init__(self, source: str) -> None:
-        print(source)
         self._internal = conda.exports.Channel(source)
+        self._name = self._internal.canonical_name  # computed on every access
+        self._urls: Dict[Tuple[str, ...], Tuple[str, ...]] = {}
+        self._packages: Dict[int, CondaPackage] = {}
 
-        if self._internal.canonical_name == source:
+        if self._name == source:
             self._filesystem = CondaFilesystem(self._internal.base_url)
         else:
             self._filesystem = CondaFilesystem(source)
@@ -44,7 +68,7 @@ class CondaChannel:
     @property
     def name(self) -> str:
         """Returns the canonical name of the anaconda channel."""
-        return self._internal.canonical_name
+        return self._name
 
     @property
     def url(self) -> str:
@@ -61,11 +85,9 @@ class CondaChannel:
 
     def find_subdirs(self) -> Tuple[str, ...]:
         """Returns all platform sub-directories within the underlying filesystem."""
-        subdirs = tuple(
-            subdir
-            for subdir in get_known_subdirs()
-            if self._filesystem.contains_directory(subdir)
-        )
+        known = get_known_subdirs()
+        existing = self._filesystem.find_directories(known)
+        subdirs = tuple(subdir for subdir in known if subdir in existing)
         return subdirs
 
     def iter_packages(self, subdirs: Iterable[str]) -> Iterator[CondaPackage]:
@@ -89,9 +111,82 @@ class CondaChannel:
         query = conda.api.SubdirData.query_all(
             spec, channels=[self._internal], subdirs=subdirs
         )
-        packages = (CondaPackage(package) for package in query)
+        packages = (self._wrap_record(package) for package in query)
         yield from packages
 
+    def query_packages_many(
+        self, specs: Iterable[str], subdirs: Iterable[str], threaded: bool = False
+    ) -> Dict[str, Tuple[CondaPackage, ...]]:
+        """Queries conda packages for several specifications in one batch.
+
+        Platform specific repodata is located once for the entire batch, rather
+        than once per specification as with `query_packages`.
+
+        Args:
+            specs: An iterable of anaconda match specification strings (query
+                syntax used in `conda search`).
+            subdirs: An iterable of platform sub-directories.
+            threaded (optional): If True, platform sub-directories are loaded and
+                queried concurrently (limited by the conda `repodata_threads`).
+
+        Returns:
+            A mapping of each specification to the matching conda packages.
+        """
+        # Mirrors `SubdirData.query_all`: the cache directory is created before any
+        # worker threads start, and only local channels are used in offline mode.
+        create_cache_dir()
+        urls = self._subdir_urls(tuple(subdirs))
+        if context.offline:
+            urls = tuple(url for url in urls if url.startswith("file://"))
+
+        specs = tuple(specs)
+        data = [conda.api.SubdirData(conda.exports.Channel(url)) for url in urls]
+
+        # Note: `SubdirData.query` is a generator, records are collected in the
+        # worker, otherwise loading and matching would run on the calling thread.
+        def query(item: conda.api.SubdirData) -> Dict[str, Tuple[Any, ...]]:
+            return {spec: tuple(item.query(spec)) for spec in specs}
+
+        # Concurrency follows the conda configuration (`repodata_threads`, `debug`)
+        workers = min(len(data), context.repodata_threads or len(data))
+        if threaded and workers > 1 and not context.debug:
+            with ThreadPoolExecutor(max_workers=workers) as executor:
+                queries = list(executor.map(query, data))
+        else:
+            queries = [query(item) for item in data]
+
+        results = {
+            spec: tuple(
+                self._wrap_record(record)
+                for result in queries
+                for record in result[spec]
+            )
+            for spec in specs
+        }
+        return results
+
+    def _wrap_record(self, record: conda.exports.PackageRecord) -> CondaPackage:
+        """Returns the conda package of a record, wrapping each record only once.
+
+        Records are cached by conda, the same record is matched by many queries
+        (and specifications) during package resolution. Reusing the wrapper saves
+        memory and lets set / dict lookups succeed on identity.
+        """
+        # Note: the wrapper references the record, its id cannot be reused
+        package = self._packages.get(id(record))
+        if package is None:
+            package = CondaPackage(record)
+            self._packages[id(record)] = package
+        return package
+
+    def _subdir_urls(self, subdirs: Tuple[str, ...]) -> Tuple[str, ...]:
+        """Returns the (cached) channel URLs of the specified sub-directories."""
+        urls = self._urls.get(subdirs)
+        if urls is None:
+            urls = tuple(self._internal.urls(with_credentials=True, subdirs=subdirs))
+            self._urls[subdirs] = urls
+        return urls
+
     def setup(self) -> None:
         """Constructs the minimal required filesystem structure."""
         if not self._filesystem.contains_file("noarch", _REPODATA_FILE):
@@ -110,20 +205,83 @@ class CondaChannel:
             BadPackageDownload: Downloaded file does not match either the advertised
             size of sha256 string.
         """
-        if self.contains_package(package):
-            contents = self._filesystem.read_file(package.subdir, package.fn)
-            if hashlib.sha256(contents).hexdigest() == package.sha256:
-                return
+        self._filesystem.make_directory(package.subdir)
+        self._download_package(package)
+
+    def add_packages(
+        self, packages: Iterable[CondaPackage], max_workers: int = _DOWNLOAD_WORKERS
+    ) -> Iterator[CondaPackage]:
+        """Adds conda packages to the underlying filesystem concurrently.
 
-        with fsspec.open(package.url, "rb") as fp:
-            contents = fp.read()
+        Downloads are dispatched to a pool of worker threads. For asynchronous
+        `fsspec` filesystems (http, s3, etc.) the network I/O of every worker is
+        multiplexed on a single event loop, the workers merely await the results.
 
-        if len(contents) != package.size:
-            raise BadPackageDownload(f"{package.fn} has incorrect size")
-        if package.sha256 != hashlib.sha256(contents).hexdigest():
-            raise BadPackageDownload(f"{package.fn} has incorrect sha256")
+        Args:
+            packages: An iterable of conda package objects to add.
+            max_workers (optional): Maximum number of concurrent downloads.
 
-        self._filesystem.write_file(package.subdir, package.fn, contents)
+        Yields:
+            Each conda package as soon as it has been added.
+
+        Raises:
+            BadPackageDownload: Downloaded file does not match either the advertised
+            size of sha256 string.
+        """
+        packages = list(packages)
+
+        # Platform sub-directories are created once, not once per package
+        for subdir in set(package.subdir for package in packages):
+            self._filesystem.make_directory(subdir)
+
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            futures = {
+                executor.submit(self._download_package, package): package
+                for package in packages
+            }
+            try:
+                for future in as_completed(futures):
+                    future.result()
+                    yield futures[future]
+            finally:
+                # Abandon pending downloads after a failure (or early exit)
+                for future in futures:
+                    future.cancel()
+
+    def _download_package(self, package: CondaPackage) -> None:
+        """Downloads a conda package into an existing platform sub-directory."""
+        if self._is_downloaded(package):
+            return
+
+        # Stream into a partial file, only verified packages are moved into place
+        partial = package.fn + _PARTIAL_SUFFIX
+        sha256, size = hashlib.sha256(), 0
+        try:
+            with fsspec.open(package.url, "rb") as source:
+                with self._filesystem.open_file(package.subdir, partial, "wb") as fp:
+                    _preallocate(fp, package.size)
+                    for chunk in iter(lambda: source.read(_CHUNK_SIZE), b""):
+                        sha256.update(chunk)
+                        size += len(chunk)
+                        fp.write(chunk)
+
+            if size != package.size:
+                raise BadPackageDownload(f"{package.fn} has incorrect size")
+            if package.sha256_digest != sha256.digest():
+                raise BadPackageDownload(f"{package.fn} has incorrect sha256")
+        except BaseException:
+            if self._filesystem.contains_file(package.subdir, partial):
+                self._filesystem.remove_file(package.subdir, partial)
+            raise
+
+        self._filesystem.move_file(package.subdir, partial, package.fn)
+
+    def _is_downloaded(self, package: CondaPackage) -> bool:
+        """Determines if a conda package exists and matches its advertised sha256."""
+        if not self.contains_package(package):
+            return False
+        checksum = self._filesystem.checksum(package.subdir, package.fn)
+        return checksum == package.sha256_digest
 
     def remove_package(self, package: CondaPackage) -> None:
         """Remove a conda package from the underlying filesystem.
@@ -136,6 +294,19 @@ class CondaChannel:
         """
         self._filesystem.remove_file(package.subdir, package.fn)
 
+    def remove_packages(self, packages: Iterable[CondaPackage]) -> None:
+        """Remove conda packages from the underlying filesystem.
+
+        Packages are removed in a single batch per platform sub-directory. Removed
+        packages are still queryable until the index of the channel has been
+        updated.
+
+        Args:
+            packages: An iterable of conda package objects to remove.
+        """
+        for subdir, group in groupby(packages, lambda package: package.subdir).items():
+            self._filesystem.remove_files(subdir, (package.fn for package in group))
+
     def contains_package(self, package: CondaPackage) -> bool:
         """Determines if a conda package exists in the underlying filesystem.
 
@@ -157,6 +328,23 @@ class CondaChannel:
         instructions = PatchInstructions.parse_raw(contents)
         return instructions
 
+    def iter_instructions(
+        self, subdirs: Iterable[str], max_workers: int = _DOWNLOAD_WORKERS
+    ) -> Iterator[Tuple[str, PatchInstructions]]:
+        """Reads patch instructions of several platform sub-directories concurrently.
+
+        Args:
+            subdirs: An iterable of platform sub-directories.
+            max_workers (optional): Maximum number of concurrent reads.
+
+        Yields:
+            Platform sub-directories (in the original order) paired with their
+            validated PatchInstructions object.
+        """
+        subdirs = list(subdirs)
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            yield from zip(subdirs, executor.map(self.read_instructions, subdirs))
+
     def write_instructions(self, subdir: str, instructions: PatchInstructions) -> None:
         """Writes platform specific patch instructions to the underlying filesystem.
 
@@ -164,7 +352,14 @@ class CondaChannel:
             subdir: Platform sub-directory of the patch instructions.
             instructions: A PatchInstructions object to write.
         """
-        contents = json.dumps(instructions.dict(by_alias=True), indent=2)
+        # Empty collections are omitted (conda-build treats missing as empty), the
+        # version is always written.
+        empty = set(
+            name
+            for name in PatchInstructions.__fields__
+            if name != "version" and not getattr(instructions, name)
+        )
+        contents = instructions.json(by_alias=True, exclude=empty, indent=2)
         self._filesystem.write_file(
             subdir, _INSTRUCTIONS_FILE, contents.encode("utf-8")
         )
@@ -176,10 +371,21 @@ class CondaChannel:
             subdir: Platform sub-directory of the repodata.
 
         Returns:
-            A validated RepoData object.
+            A RepoData object, the package entries themselves are not validated.
         """
         contents = self._filesystem.read_file(subdir, _REPODATA_FILE, b"{}")
-        repodata = RepoData.parse_raw(contents)
+        data = _json_loads(contents)
+
+        # Package entries (tens of thousands in large channels) are only passed
+        # through, validation is restricted to the much smaller top level.
+        packages = data.pop("packages", {})
+        conda_packages = data.pop("conda.packages", {})
+        if not isinstance(packages, dict) or not isinstance(conda_packages, dict):
+            raise ValueError(f"Invalid package entries in {subdir} repodata")
+
+        repodata = RepoData.parse_obj(data)
+        repodata.packages = packages
+        repodata.conda_packages = conda_packages
         return repodata
 
     def write_repodata(self, subdir: str, repodata: RepoData) -> None:
@@ -189,8 +395,21 @@ class CondaChannel:
             subdir: Platform sub-directory of the patch instructions.
             instructions: A RepoData object to write.
         """
-        contents = json.dumps(repodata.dict(by_alias=True), indent=2)
-        self._filesystem.write_file(subdir, _REPODATA_FILE, contents.encode("utf-8"))
+        # Note: repodata is streamed into a partial file (moved into place when
+        # complete), the serialized document is never held in memory as a whole.
+        # The layout is compact (`json.dumps` defaults) rather than indented.
+        document = {
+            field.alias: getattr(repodata, name)
+            for name, field in RepoData.__fields__.items()
+        }
+        if not document["removed"]:
+            del document["removed"]  # optional, conda treats missing as empty
+        partial = _REPODATA_FILE + _PARTIAL_SUFFIX
+        self._filesystem.make_directory(subdir)
+        with self._filesystem.open_file(subdir, partial, "wb") as fp:
+            for chunk in _iter_json(document):
+                fp.write(chunk.encode("utf-8"))
+        self._filesystem.move_file(subdir, partial, _REPODATA_FILE)
 
 
 class LocalCondaChannel(CondaChannel):
@@ -210,12 +429,35 @@ class LocalCondaChannel(CondaChannel):
             raise ValueError("Filesystem is not local")
 
         self._path = Path(self._filesystem.root).resolve()
+        self._verified: Optional[Dict[str, List[Any]]] = None
+        self._verified_lock = threading.Lock()
 
     @property
     def path(self) -> Path:
         """Returns the complete URL of the anaconda channel."""
         return self._path
 
+    def add_package(self, package: CondaPackage) -> None:
+        super().add_package(package)
+        self._save_verified()
+
+    def add_packages(
+        self, packages: Iterable[CondaPackage], max_workers: int = _DOWNLOAD_WORKERS
+    ) -> Iterator[CondaPackage]:
+        try:
+            yield from super().add_packages(packages, max_workers=max_workers)
+        finally:
+            self._save_verified()
+
+    def remove_package(self, package: CondaPackage) -> None:
+        super().remove_package(package)
+        self._forget_verified([f"{package.subdir}/{package.fn}"])
+
+    def remove_packages(self, packages: Iterable[CondaPackage]) -> None:
+        packages = list(packages)
+        super().remove_packages(packages)
+        self._forget_verified(f"{package.subdir}/{package.fn}" for package in packages)
+
     def update_index(self) -> None:
         """Update the package index of the channel."""
         generator = self._path / _PATCH_GENERATOR_FILE
@@ -226,7 +468,15 @@ class LocalCondaChannel(CondaChannel):
 
     def merge(self, source: LocalCondaChannel) -> None:
         """Merge the underlying filesystems of the another channel."""
-        shutil.copytree(source._path, self._path, dirs_exist_ok=True)
+        # Verification records describe files of the source, not of this channel
+        ignore = shutil.ignore_patterns(_VERIFIED_FILE)
+        shutil.copytree(
+            source._path,
+            self._path,
+            ignore=ignore,
+            copy_function=_link_or_copy,
+            dirs_exist_ok=True,
+        )
 
     def write_patch_generator(self) -> None:
         """Write a patch generator to the underlying filesystem.
@@ -236,16 +486,93 @@ class LocalCondaChannel(CondaChannel):
         """
         generator = self._path / _PATCH_GENERATOR_FILE
         generator.parent.mkdir(exist_ok=True, parents=True)
-        with tarfile.open(generator, "w:bz2") as tar:
-            for instructions in self._path.glob("**/" + _INSTRUCTIONS_FILE):
+        # Note: conda-build expects bz2, the fastest level is used (small text files)
+        files = sorted(self._path.glob("**/" + _INSTRUCTIONS_FILE))
+        with tarfile.open(generator, "w:bz2", compresslevel=1) as tar:
+            for instructions in files:
                 tar.add(instructions, arcname=instructions.relative_to(self._path))
 
+    def _download_package(self, package: CondaPackage) -> None:
+        super()._download_package(package)
+        self._record_verified(package)
+
+    def _is_downloaded(self, package: CondaPackage) -> bool:
+        """Determines if a conda package exists and matches its advertised sha256.
+
+        Packages are only hashed when their size or modification time differs from
+        the last successful verification, unchanged files are trusted.
+        """
+        key = f"{package.subdir}/{package.fn}"
+        stat = self._stat_package(package)
+        if stat is None:
+            return False
+
+        with self._verified_lock:
+            record = self._load_verified().get(key)
+        if record == [*stat, package.sha256]:
+            return True
+
+        if not super()._is_downloaded(package):
+            return False
+
+        self._record_verified(package)
+        return True
+
+    def _stat_package(self, package: CondaPackage) -> Optional[Tuple[int, int]]:
+        """Returns the size and modification time (ns) of a package file."""
+        try:
+            stat = (self._path / package.subdir / package.fn).stat()
+        except FileNotFoundError:
+            return None
+        return stat.st_size, stat.st_mtime_ns
+
+    def _record_verified(self, package: CondaPackage) -> None:
+        """Records the current state of a package file that matches its sha256."""
+        stat = self._stat_package(package)
+        if stat is None:
+            return
+        with self._verified_lock:
+            verified = self._load_verified()
+            verified[f"{package.subdir}/{package.fn}"] = [*stat, package.sha256]
+
+    def _load_verified(self) -> Dict[str, List[Any]]:
+        """Lazily loads the verification records of the channel (requires lock)."""
+        if self._verified is None:
+            try:
+                contents = (self._path / _VERIFIED_FILE).read_bytes()
+                self._verified = json.loads(contents)
+            except (OSError, ValueError):
+                self._verified = {}
+        return self._verified
+
+    def _save_verified(self) -> None:
+        """Writes the verification records of the channel, if they were loaded."""
+        with self._verified_lock:
+            if self._verified is None:
+                return
+            contents = json.dumps(self._verified, separators=(",", ":"))
+            # Replaced atomically, an interrupted write never leaves a truncated file
+            partial = self._path / (_VERIFIED_FILE + _PARTIAL_SUFFIX)
+            partial.write_text(contents, encoding="utf-8")
+            os.replace(partial, self._path / _VERIFIED_FILE)
+
+    def _forget_verified(self, keys: Iterable[str]) -> None:
+        """Removes the verification records of removed package files."""
+        with self._verified_lock:
+            verified = self._load_verified()
+            removed = [verified.pop(key, None) for key in keys]
+        if any(record is not None for record in removed):
+            self._save_verified()
+
     def _purge_removed_packages(self) -> None:
         """Purge files marked for removal from underlying filesystem."""
         for subdir in self.find_subdirs():
             repodata = self.read_repodata(subdir)
-            for filename in repodata.removed:
-                self._filesystem.remove_file(subdir, filename)
+            if not repodata.removed:
+                continue  # nothing to purge, leave the repodata untouched
+
+            self._filesystem.remove_files(subdir, repodata.removed)
+            self._forget_verified(f"{subdir}/{fn}" for fn in repodata.removed)
             repodata.removed = []
             self.write_repodata(subdir, repodata)
 
@@ -264,7 +591,7 @@ class CondaFilesystem:
     """
 
     def __init__(self, url: str) -> None:
-        self._mapper = fsspec.get_mapper(url)
+        self._mapper = _get_mapper(url)
 
     @property
     def is_local(self) -> bool:
@@ -311,6 +638,42 @@ class CondaFilesystem:
         urlpath = self.urlpath(subdir, filename)
         self._mapper[urlpath] = contents
 
+    def open_file(self, subdir: str, filename: str, mode: str = "rb") -> Any:
+        """Opens a file within the filesystem.
+
+        Unlike `write_file`, parent directories are not created when writing.
+
+        Args:
+            subdir: Platform sub-directory of the file.
+            filename: Name of the file.
+            mode (optional): Mode in which the file is opened.
+
+        Returns:
+            A file-like object.
+        """
+        return self._mapper.fs.open(self.urlpath(self.root, subdir, filename), mode)
+
+    def make_directory(self, directory: str) -> None:
+        """Create a directory (and any missing parents) within the filesystem.
+
+        Args:
+            directory: Name of the directory.
+        """
+        self._mapper.fs.mkdirs(self.urlpath(self.root, directory), exist_ok=True)
+
+    def move_file(self, subdir: str, source: str, destination: str) -> None:
+        """Move (rename) a file within a platform sub-directory of the filesystem.
+
+        Args:
+            subdir: Platform sub-directory of the file.
+            source: Current name of the file.
+            destination: New name of the file, existing files are replaced.
+        """
+        self._mapper.fs.mv(
+            self.urlpath(self.root, subdir, source),
+            self.urlpath(self.root, subdir, destination),
+        )
+
     def remove_file(self, subdir: str, filename: str) -> None:
         """Remove a file from the filesystem.
 
@@ -321,6 +684,43 @@ class CondaFilesystem:
         urlpath = self.urlpath(subdir, filename)
         del self._mapper[urlpath]
 
+    def remove_files(self, subdir: str, filenames: Iterable[str]) -> None:
+        """Remove several files from a platform sub-directory in a single batch.
+
+        Args:
+            subdir: Platform sub-directory of the files.
+            filenames: Names of the files.
+        """
+        paths = [self.urlpath(self.root, subdir, filename) for filename in filenames]
+        if paths:
+            self._mapper.fs.rm(paths)
+
+    def checksum(self, subdir: str, filename: str) -> bytes:
+        """Computes the sha256 checksum of a file within the filesystem.
+
+        Local files are memory mapped and hashed in a single call, other files
+        are streamed in fixed size chunks. In both cases the file is never read
+        into memory as a whole.
+
+        Args:
+            subdir: Platform sub-directory of the file.
+            filename: Name of the file.
+
+        Returns:
+            The (raw) sha256 digest of the file.
+        """
+        sha256 = hashlib.sha256()
+        if self.is_local:
+            with open(self.urlpath(self.root, subdir, filename), "rb") as fp:
+                if os.fstat(fp.fileno()).st_size:  # empty files cannot be mapped
+                    with mmap.mmap(fp.fileno(), 0, access=mmap.ACCESS_READ) as view:
+                        sha256.update(view)
+        else:
+            with self.open_file(subdir, filename) as fp:
+                for chunk in iter(lambda: fp.read(_CHUNK_SIZE), b""):
+                    sha256.update(chunk)
+        return sha256.digest()
+
     def contains_file(self, subdir: str, filename: str) -> bool:
         """Determine if a file exists within the filesystem.
 
@@ -345,6 +745,35 @@ class CondaFilesystem:
         """
         return self._mapper.fs.exists(self.urlpath(self.root, directory))
 
+    def find_directories(self, directories: Iterable[str]) -> Set[str]:
+        """Determine which of the specified directories exist within the filesystem.
+
+        Local filesystems are listed once, other filesystems are probed for each
+        directory concurrently (listings are not reliable for remote channels).
+
+        Args:
+            directories: Names of candidate directories.
+
+        Returns:
+            The subset of candidate directories that exist.
+        """
+        directories = list(directories)
+        if self.is_local:
+            try:
+                entries = self._mapper.fs.ls(self.root, detail=True)
+            except FileNotFoundError:
+                return set()
+            names = set(
+                entry["name"].rstrip("/").rsplit("/", 1)[-1]
+                for entry in entries
+                if entry["type"] == "directory"
+            )
+            return names.intersection(directories)
+
+        with ThreadPoolExecutor(max_workers=_DOWNLOAD_WORKERS) as executor:
+            exists = executor.map(self.contains_directory, directories)
+            return set(name for name, found in zip(directories, exists) if found)
+
     def urlpath(self, *parts: str) -> str:
         """Returns a URL of an object within the filesystem relative the root."""
         return "/".join(parts)
@@ -369,6 +798,9 @@ class RepoData(BaseModel):
     removed: List[str] = Field(default_factory=list)
     version: int = Field(1, alias="repodata_version")
 
+    class Config:
+        json_loads = _json_loads
+
 
 class PatchInstructions(BaseModel):
     """Represents the data in a platform specific patch_instructions.json file."""
@@ -378,3 +810,64 @@ class PatchInstructions(BaseModel):
     remove: List[str] = Field(default_factory=list)
     revoke: List[str] = Field(default_factory=list)
     version: int = Field(1, alias="patch_instructions_version")
+
+    class Config:
+        json_loads = _json_loads
+
+
+@functools.lru_cache(maxsize=32)
+def _get_mapper(url: str) -> fsspec.FSMap:
+    """Returns a (shared) key-value mapper of the filesystem at the specified URL.
+
+    Channels of the same URL share the mapper, and with it the filesystem and any
+    underlying network session (connection pooling, keep-alive, etc.).
+    """
+    return fsspec.get_mapper(url)
+
+
+def _iter_json(document: Dict[str, Any]) -> Iterator[str]:
+    """Serializes a json object in chunks, nested objects are split per entry.
+
+    The output is identical to `json.dumps(document)`.
+    """
+    yield "{"
+    for index, (key, value) in enumerate(document.items()):
+        yield (", " if index else "") + json.dumps(key) + ": "
+        if isinstance(value, dict):
+            yield "{"
+            for inner, (name, entry) in enumerate(value.items()):
+                prefix = ", " if inner else ""
+                yield prefix + json.dumps(name) + ": " + json.dumps(entry)
+            yield "}"
+        else:
+            yield json.dumps(value)
+    yield "}"
+
+
+def _link_or_copy(source: str, destination: str) -> str:
+    """Hard links package files (copies everything else) during a channel merge.
+
+    Package files are never modified in place, sharing them is therefore safe and
+    avoids copying their contents. Falls back to a copy across devices or on
+    filesystems that do not support hard links.
+    """
+    if source.endswith(_PACKAGE_EXTENSIONS) and not os.path.exists(destination):
+        try:
+            os.link(source, destination)
+            return destination
+        except OSError:
+            pass
+    return shutil.copy2(source, destination)
+
+
+def _preallocate(fp: Any, size: int) -> None:
+    """Reserve contiguous space for a file of known size (best effort).
+
+    Only supported for local files on POSIX platforms, otherwise a no-op.
+    """
+    if not size or not hasattr(os, "posix_fallocate"):
+        return
+    try:
+        os.posix_fallocate(fp.fileno(), 0, size)
+    except (AttributeError, OSError, io.UnsupportedOperation):
+        pass  # not backed by a local file, or unsupported by the filesystem
@@ -59,6 +59,11 @@ class CondaPackage:
     def sha256(self) -> str:
         return self._internal.sha256
 
+    @property
+    def sha256_digest(self) -> bytes:
+        sha256 = self._internal.sha256
+        return bytes.fromhex(sha256) if sha256 else b""
+
     @property
     def subdir(self) -> str:
         return self._internal.subdir
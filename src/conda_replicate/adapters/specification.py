@@ -1,11 +1,16 @@
 from __future__ import annotations
 
+from typing import Dict
+
 import conda.exceptions
 import conda.exports
 
 from conda_replicate import CondaReplicateException
 from conda_replicate.adapters.package import CondaPackage
 
+# Fields that make up the equality key of a conda package
+_PACKAGE_KEY_FIELDS = frozenset({"subdir", "name", "version", "build_number", "build"})
+
 
 class CondaSpecification:
     def __init__(self, spec: str) -> None:
@@ -14,6 +19,16 @@ class CondaSpecification:
         except conda.exceptions.InvalidVersionSpec as exception:
             raise InvalidCondaSpecification(exception)
 
+        # Match results can only be cached when every constrained field is part of
+        # the package equality key (equal packages from other channels may differ
+        # in channel, md5, url, etc.)
+        self._matches: Dict[CondaPackage, bool] = {}
+        self._cacheable = all(
+            self._internal.get_raw_value(field) is None
+            for field in conda.exports.MatchSpec.FIELD_NAMES
+            if field not in _PACKAGE_KEY_FIELDS
+        )
+
     @property
     def name(self) -> str:
         return self._internal.name
@@ -23,8 +38,15 @@ class CondaSpecification:
         return self._internal.original_spec_str
 
     def match(self, package: CondaPackage) -> bool:
-        # Note: Internal match uses package properties
-        return self._internal.match(package)
+        if not self._cacheable:
+            return self._internal.match(package)
+
+        matched = self._matches.get(package)
+        if matched is None:
+            # Note: Internal match uses package properties
+            matched = self._internal.match(package)
+            self._matches[package] = matched
+        return matched
 
     def __repr__(self):
         class_name = self.__class__.__name__
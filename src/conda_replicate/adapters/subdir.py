@@ -1,11 +1,16 @@
-from typing import List
+import functools
+from typing import Tuple
 
 from conda.base.context import context
 
 
-def get_default_subdirs() -> List[str]:
-    return list(context.subdirs)
+# Note: subdirs are fixed for the lifetime of the conda context, results are cached
+# (and immutable) to avoid repeated walks of the context machinery.
+@functools.lru_cache(maxsize=1)
+def get_default_subdirs() -> Tuple[str, ...]:
+    return tuple(context.subdirs)
 
 
-def get_known_subdirs() -> List[str]:
-    return list(context.known_subdirs)
+@functools.lru_cache(maxsize=1)
+def get_known_subdirs() -> Tuple[str, ...]:
+    return tuple(context.known_subdirs)
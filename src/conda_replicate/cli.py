@@ -1,27 +1,31 @@
+from __future__ import annotations
+
+import functools
+import hashlib
+import json
 import logging
+import os
 import sys
-from typing import TYPE_CHECKING, Any, Callable, Set
-
-import pydantic
-import yaml
-from pydantic import BaseSettings
-from pydantic import Field
+from dataclasses import dataclass
+from dataclasses import field
+from pathlib import Path
+from typing import TYPE_CHECKING, Any, Callable, Dict, FrozenSet, Set, Tuple
 
 from conda_replicate import CondaReplicateException
 from conda_replicate import __version__
 from conda_replicate.adapters.subdir import get_default_subdirs
 from conda_replicate.adapters.subdir import get_known_subdirs
-from conda_replicate.core import run_index
-from conda_replicate.core import run_merge
-from conda_replicate.core import run_patch
-from conda_replicate.core import run_query
-from conda_replicate.core import run_update
 
 # mypy has issues with the dynamic nature of rich-click
 if TYPE_CHECKING:  # pragma: no cover
     import click
+    import yaml
+    from click import Command as RichCommand
+    from click import Group as RichGroup
 else:
     import rich_click as click
+    from rich_click import RichCommand
+    from rich_click import RichGroup
 
     click.rich_click.MAX_WIDTH = 120
     click.rich_click.STYLE_ABORTED = "bold red"
@@ -34,54 +38,176 @@ else:
     click.rich_click.STYLE_ERRORS_SUGGESTION = "bold"
     click.rich_click.USE_MARKDOWN = True
 
-_DEFAULT_SUBDIRS = get_default_subdirs()
-_KNOWN_SUBDIRS = get_known_subdirs()
-_ALLOWED_SUBDIRS = [subdir for subdir in sorted(_KNOWN_SUBDIRS)]
 
+class _Choice(click.types.Choice):
+    """Choice parameter type with a constant time lookup of exact matches."""
+
+    def __init__(self, choices: Tuple[str, ...]) -> None:
+        super().__init__(choices)
+        self._exact = {choice: choice for choice in choices}
+
+    def convert(self, value: Any, param: Any, ctx: Any) -> Any:
+        try:
+            return self._exact[value]
+        except (KeyError, TypeError):
+            return super().convert(value, param, ctx)  # normalization or failure
+
+
+_DEFAULT_SUBDIRS = tuple(sys.intern(subdir) for subdir in get_default_subdirs())
+_KNOWN_SUBDIRS = tuple(sys.intern(subdir) for subdir in sorted(get_known_subdirs()))
+_SUBDIRS_CHOICE = _Choice(_KNOWN_SUBDIRS)
+_SUBDIRS_HELP = (
+    "Selected platform sub-directories. Multiple options may be passed at one "
+    f"time. Allowed values: {{{', '.join(_KNOWN_SUBDIRS)}}}."
+)
+
+_OUTPUT_CHOICES = ("table", "list", "json")
+_OUTPUT_CHOICE = _Choice(_OUTPUT_CHOICES)
+_OUTPUT_HELP = (
+    "Specifies the format of the search results. Allowed values: "
+    f"{{{', '.join(_OUTPUT_CHOICES)}}}."
+)
 
-class AppState(BaseSettings):
+# Key of the application state in the click context `meta` mapping
+_STATE_KEY = "conda_replicate.state"
+
+# Application errors are only styled when reported to a terminal
+_STDERR_IS_TTY = sys.stderr.isatty()
+
+_CONFIGURATION_CACHE = (
+    Path(os.environ.get("XDG_CACHE_HOME") or Path.home() / ".cache")
+    / "conda-replicate"
+    / "configs"
+)
+
+# Parsed configuration files kept in the cache, least recently parsed are pruned
+_CONFIGURATION_CACHE_SIZE = 32
+
+
+@dataclass
+class AppState:
     """Persistent application state."""
 
     channel: str = "conda-forge"
     target: str = ""
     debug: bool = False
     quiet: bool = False
-    requirements: Set[str] = Field(default_factory=set)
-    exclusions: Set[str] = Field(default_factory=set)
-    disposables: Set[str] = Field(default_factory=set)
-    subdirs: Set[str] = Field(default_factory=set)
+    # Accumulated as given, duplicates are dropped once the command is dispatched.
+    # Immutable, untouched parameters share the (singleton) empty tuple.
+    requirements: Tuple[str, ...] = ()
+    exclusions: Tuple[str, ...] = ()
+    disposables: Tuple[str, ...] = ()
+    subdirs: Tuple[str, ...] = ()
 
 
-pass_state = click.make_pass_decorator(AppState, ensure=True)
+def _state(context: click.Context) -> AppState:
+    """Returns the application state, created on first access.
+
+    The state is kept in the context `meta` mapping, which is shared by all nested
+    contexts, rather than looked up through the context chain on every access.
+    """
+    state = context.meta.get(_STATE_KEY)
+    if state is None:
+        state = context.meta[_STATE_KEY] = AppState()
+    return state
 
 
-class Configuration(BaseSettings):
+def pass_state(function: Callable) -> Callable:
+    """Decorator that passes the application state as the first argument."""
+
+    def wrapper(context: click.Context, *args, **kwargs):
+        return function(_state(context), *args, **kwargs)
+
+    return click.pass_context(functools.update_wrapper(wrapper, function))
+
+
+@dataclass
+class Configuration:
     """The current state of configuration file settings."""
 
     channel: str = ""
     target: str = ""
-    requirements: Set[str] = Field(default_factory=set)
-    exclusions: Set[str] = Field(default_factory=set)
-    disposables: Set[str] = Field(default_factory=set)
-    subdirs: Set[str] = Field(default_factory=set)
+    requirements: Set[str] = field(default_factory=set)
+    exclusions: Set[str] = field(default_factory=set)
+    disposables: Set[str] = field(default_factory=set)
+    subdirs: Set[str] = field(default_factory=set)
     quiet: bool = False
 
+    # Names of the settings explicitly specified in the configuration file
+    fields_set: FrozenSet[str] = field(default=frozenset(), repr=False, compare=False)
 
-def channel_option(function: Callable):
-    """Decorator for the `channel` option. Not exposed to the underlying command."""
+    @classmethod
+    def parse_obj(cls, contents: Any) -> Configuration:
+        """Validates the (parsed) contents of a configuration file.
+
+        Unknown settings are ignored. Collections of strings are accepted for set
+        based settings.
+
+        Raises:
+            ValueError: Invalid configuration file contents.
+        """
+        if contents is None:
+            contents = {}
+        if not isinstance(contents, dict):
+            raise ValueError("Configuration file must contain a mapping of settings")
+
+        values: Dict[str, Any] = {}
+        for name, default in _CONFIGURATION_DEFAULTS.items():
+            if name not in contents:
+                continue
+
+            value = contents[name]
+            if isinstance(default, set):
+                if isinstance(value, str) or not isinstance(value, (list, set)):
+                    raise ValueError(f"Setting {name!r} must be a list of strings")
+                value = set(str(item) for item in value)
+            elif not isinstance(value, type(default)):
+                kind = type(default).__name__
+                raise ValueError(f"Setting {name!r} must be of type {kind!r}")
+            values[name] = value
+
+        return cls(**values, fields_set=frozenset(values))
+
+
+# Default values of the settings that may be specified in a configuration file
+_CONFIGURATION_DEFAULTS: Dict[str, Any] = {
+    name: value for name, value in vars(Configuration()).items() if name != "fields_set"
+}
+
+
+@functools.lru_cache(maxsize=None)
+def _state_callback(name: str, merge: bool = False) -> Callable:
+    """Returns an option callback that stores values in the application state.
+
+    Callbacks are pure with respect to their arguments, each is only built once.
+
+    Args:
+        name: Name of the application state attribute.
+        merge (optional): If True, values are appended to the existing attribute,
+            otherwise the attribute is replaced.
+    """
 
     def callback(context: click.Context, parameter: click.Parameter, value: Any):
-        state = context.ensure_object(AppState)
+        state = _state(context)
         if value:
-            state.channel = value
-        return state.channel
+            if merge:
+                setattr(state, name, getattr(state, name) + tuple(value))
+            else:
+                setattr(state, name, value)
+        return getattr(state, name)
+
+    callback.__name__ = f"{name}_callback"
+    return callback
 
+
+def channel_option(function: Callable):
+    """Decorator for the `channel` option. Not exposed to the underlying command."""
     return click.option(
         "-c",
         "--channel",
         "channel",
         type=click.types.STRING,
-        callback=callback,
+        callback=_state_callback("channel"),
         show_default=True,
         expose_value=False,  # Must be False
         is_eager=False,  # Must be False
@@ -93,31 +219,249 @@ def channel_option(function: Callable):
     )(function)
 
 
-def configuration_option(function):
-    """Decorator for the `config` option. Not exposed to the underlying command."""
+def _configuration_callback(
+    context: click.Context, parameter: click.Parameter, value: Any
+):
+    """Applies the settings of a configuration file to the application state."""
+    state = _state(context)
+    if value:
+        try:
+            configuration = _load_configuration(value)
+        except ValueError as exception:
+            raise click.BadParameter(str(exception), context, parameter)
 
-    def callback(context: click.Context, parameter: click.Parameter, value: Any):
-        state = context.ensure_object(AppState)
-        if value:
-            with open(value, "rt") as file:
-                contents = yaml.load(file, Loader=yaml.CLoader)
-                configuration = Configuration.parse_obj(contents)
+        for name in configuration.fields_set:
+            setting = getattr(configuration, name)
+            if isinstance(setting, set):
+                setting = tuple(setting)
+            setattr(state, name, setting)
+    return value
 
-            for name in configuration.__fields_set__:
-                setattr(state, name, getattr(configuration, name))
-        return value
 
+def configuration_option(function):
+    """Decorator for the `config` option. Not exposed to the underlying command."""
     return click.option(
         "--config",
         default=None,
         type=click.types.Path(exists=True, file_okay=True, dir_okay=False),
-        callback=callback,
+        callback=_configuration_callback,
         expose_value=False,  # Must be False
         is_eager=True,  # Must be True
-        help="Path to the yaml configuration file.",
+        help="Path to the yaml (or json) configuration file.",
     )(function)
 
 
+def _load_configuration(path: str) -> Configuration:
+    """Loads a yaml configuration file, parsed contents are cached on disk.
+
+    The cache is keyed by the absolute path, modification time and size of the
+    file, as well as the application version and known settings. Cached contents
+    are stored as json, which is much faster to parse than yaml. Cache failures
+    are never fatal, the file is simply parsed again.
+
+    Configuration files with a `.json` suffix are parsed directly as json.
+    """
+    if path.lower().endswith(".json"):
+        with open(path, "rb") as file:
+            return Configuration.parse_obj(json.loads(file.read()))
+
+    stat = os.stat(path)
+    settings = ",".join(sorted(_CONFIGURATION_DEFAULTS))
+    key = f"{__version__}:{settings}:{os.path.abspath(path)}"
+    key += f":{stat.st_mtime_ns}:{stat.st_size}"
+    digest = hashlib.blake2b(key.encode("utf-8"), digest_size=16).hexdigest()
+    cached = _CONFIGURATION_CACHE / f"{digest}.json"
+
+    try:
+        contents = json.loads(cached.read_text(encoding="utf-8"))
+    except (OSError, ValueError):
+        contents = _read_configuration(path)
+        try:
+            cached.parent.mkdir(parents=True, exist_ok=True)
+            partial = cached.with_suffix(f".{os.getpid()}.partial")
+            partial.write_text(json.dumps(contents), encoding="utf-8")
+            os.replace(partial, cached)
+            _prune_configuration_cache()
+        except (OSError, TypeError, ValueError):
+            pass  # not cacheable (read-only cache, non-json values, etc.)
+
+    return Configuration.parse_obj(contents)
+
+
+def _prune_configuration_cache() -> None:
+    """Removes the least recently parsed configuration files from the cache."""
+    entries = []
+    for entry in _CONFIGURATION_CACHE.glob("*.json"):
+        try:
+            entries.append((entry.stat().st_mtime_ns, entry))
+        except OSError:
+            pass  # removed concurrently
+    entries.sort(reverse=True)
+    for _, entry in entries[_CONFIGURATION_CACHE_SIZE:]:
+        try:
+            entry.unlink()
+        except OSError:
+            pass
+
+
+def _read_configuration(path: str) -> Any:
+    """Reads a yaml configuration file, only known settings are constructed.
+
+    The top-level mapping is scanned as a stream of parser events, values of unknown
+    settings are skipped without ever being composed into nodes. Documents that do
+    not fit this shape (not a mapping, complex keys or aliases) are composed in full.
+
+    Raises:
+        ValueError: Invalid yaml document.
+    """
+    import yaml  # deferred, only needed with a configuration file
+
+    # Read whole, the (c)parser handles a single string faster than chunked reads
+    with open(path, "rt", encoding="utf-8") as file:
+        text = file.read()
+
+    try:
+        return _parse_configuration(text)
+    except yaml.YAMLError as exception:
+        raise ValueError(f"Invalid yaml configuration file: {exception}")
+
+
+def _parse_configuration(text: str) -> Any:
+    """Parses the known settings of a yaml configuration document."""
+    import yaml
+
+    loader = _yaml_loader()(text)
+    try:
+        return _scan_configuration(loader)
+    except _UnscannableConfiguration:
+        pass
+    finally:
+        loader.dispose()
+
+    loader = _yaml_loader()(text)
+    try:
+        node = loader.get_single_node()
+        if not isinstance(node, yaml.MappingNode):
+            return None if node is None else loader.construct_document(node)
+
+        loader.flatten_mapping(node)  # resolve merge keys (<<) first
+        contents = {}
+        for key_node, value_node in node.value:
+            key = loader.construct_object(key_node, deep=True)
+            if isinstance(key, str) and key in _CONFIGURATION_DEFAULTS:
+                contents[key] = loader.construct_object(value_node, deep=True)
+        return contents
+    finally:
+        loader.dispose()
+
+
+@functools.lru_cache(maxsize=None)
+def _yaml_loader() -> Any:
+    """Returns the safe yaml loader, accelerated by libyaml when available."""
+    try:
+        from yaml import CSafeLoader as loader
+    except ImportError:  # pragma: no cover
+        from yaml import SafeLoader as loader  # type: ignore
+    return loader
+
+
+class _UnscannableConfiguration(Exception):
+    """Configuration document can not be scanned as a stream of events."""
+
+
+def _scan_configuration(loader: Any) -> Any:
+    """Constructs the known top-level settings of a configuration document."""
+    import yaml
+
+    loader.get_event()  # stream start
+    if loader.check_event(yaml.StreamEndEvent):
+        return None  # empty file
+    loader.get_event()  # document start
+    if not loader.check_event(yaml.MappingStartEvent):
+        raise _UnscannableConfiguration()
+    loader.get_event()
+
+    contents = {}
+    while not loader.check_event(yaml.MappingEndEvent):
+        if not loader.check_event(yaml.ScalarEvent):
+            raise _UnscannableConfiguration()
+        key_node = _compose_event_node(loader)
+        if key_node.tag == "tag:yaml.org,2002:merge":
+            raise _UnscannableConfiguration()  # merge keys (<<) need the full mapping
+        key = loader.construct_object(key_node)
+        if key in _CONFIGURATION_DEFAULTS:
+            node = _compose_event_node(loader)
+            contents[key] = loader.construct_object(node, deep=True)
+        else:
+            _skip_event_node(loader)
+
+    loader.get_event()  # mapping end
+    loader.get_event()  # document end
+    if not loader.check_event(yaml.StreamEndEvent):
+        raise _UnscannableConfiguration()  # multiple documents
+    return contents
+
+
+def _compose_event_node(loader: Any) -> yaml.Node:
+    """Composes the node of the upcoming parser events (anchors are unsupported)."""
+    import yaml
+
+    event = loader.get_event()
+    if isinstance(event, yaml.AliasEvent) or event.anchor is not None:
+        raise _UnscannableConfiguration()
+
+    tag = event.tag
+    if isinstance(event, yaml.ScalarEvent):
+        if tag is None or tag == "!":
+            tag = loader.resolve(yaml.ScalarNode, event.value, event.implicit)
+        return yaml.ScalarNode(
+            tag, event.value, event.start_mark, event.end_mark, style=event.style
+        )
+
+    if isinstance(event, yaml.SequenceStartEvent):
+        if tag is None or tag == "!":
+            tag = loader.resolve(yaml.SequenceNode, None, event.implicit)
+        items = []
+        while not loader.check_event(yaml.SequenceEndEvent):
+            items.append(_compose_event_node(loader))
+        end = loader.get_event()
+        return yaml.SequenceNode(tag, items, event.start_mark, end.end_mark)
+
+    if tag is None or tag == "!":
+        tag = loader.resolve(yaml.MappingNode, None, event.implicit)
+    pairs = []
+    while not loader.check_event(yaml.MappingEndEvent):
+        pairs.append((_compose_event_node(loader), _compose_event_node(loader)))
+    end = loader.get_event()
+    return yaml.MappingNode(tag, pairs, event.start_mark, end.end_mark)
+
+
+def _skip_event_node(loader: Any) -> None:
+    """Consumes the parser events of the upcoming node without composing it."""
+    import yaml
+
+    depth = 0
+    while True:
+        event = loader.get_event()
+        if isinstance(event, (yaml.SequenceStartEvent, yaml.MappingStartEvent)):
+            depth += 1
+        elif isinstance(event, (yaml.SequenceEndEvent, yaml.MappingEndEvent)):
+            depth -= 1
+        if depth == 0:
+            return
+
+
+def _debug_callback(context: click.Context, parameter: click.Parameter, value: Any):
+    """Stores the `debug` flag, debugging forces the quiet mode."""
+    state = _state(context)
+    if value is not None:
+        state.debug = value
+    if state.debug:
+        _enable_debug_logging()
+        state.quiet = True  # no animation / progress in debug mode
+    return state.debug
+
+
 def debug_option(function: Callable):
     """
     Decorator for the `quiet` command line option.  Not exposed underlying command.
@@ -125,51 +469,40 @@ def debug_option(function: Callable):
     The `debug` option prints debugging information to stdout. Should force the
     quiet command to a matching value.
     """
-
-    def callback(context: click.Context, parameter: click.Parameter, value: Any):
-        state = context.ensure_object(AppState)
-        if value is not None:
-            state.debug = value
-        if state.debug:
-            logging.basicConfig(
-                format="%(filename)s: %(message)s",
-                stream=sys.stdout,
-                level=logging.DEBUG,
-            )
-            state.quiet = True  # no animation / progress in debug mode
-        return state.debug
-
     return click.option(
         "-d",
         "--debug",
         is_flag=True,
         default=None,  # Must be None
-        callback=callback,
+        callback=_debug_callback,
         expose_value=False,  # Must be False
         is_eager=False,  # Must be False
         help="Enable debugging output. Automatically enters quiet mode.",
     )(function)
 
 
+@functools.lru_cache(maxsize=None)
+def _enable_debug_logging() -> None:
+    """Configures debug logging to stdout (only once per process)."""
+    logging.basicConfig(
+        format="%(filename)s: %(message)s",
+        stream=sys.stdout,
+        level=logging.DEBUG,
+    )
+
+
 def exclusions_option(function: Callable):
     """Decorator for the `exclude` option. Not exposed to the underlying command.
 
     Options specified on the command line are added to 'exclusions` list in the
     configuration file.
     """
-
-    def callback(context: click.Context, parameter: click.Parameter, value: Any):
-        state = context.ensure_object(AppState)
-        if value:
-            state.exclusions.update(value)
-        return state.exclusions
-
     return click.option(
         "--exclude",
         "exclusions",
         multiple=True,
         type=click.types.STRING,
-        callback=callback,
+        callback=_state_callback("exclusions", merge=True),
         expose_value=False,  # Must be False
         is_eager=False,  # Must be False
         help=(
@@ -185,19 +518,12 @@ def disposables_option(function: Callable):
     Options specified on the command line are added to 'disposables` list in the
     configuration file.
     """
-
-    def callback(context: click.Context, parameter: click.Parameter, value: Any):
-        state = context.ensure_object(AppState)
-        if value:
-            state.disposables.update(value)
-        return state.disposables
-
     return click.option(
         "--dispose",
         "disposables",
         multiple=True,
         type=click.types.STRING,
-        callback=callback,
+        callback=_state_callback("disposables", merge=True),
         expose_value=False,  # Must be False
         is_eager=False,  # Must be False
         help=(
@@ -208,42 +534,47 @@ def disposables_option(function: Callable):
     )(function)
 
 
-def quiet_option(function: Callable):
-    """Decorator for the `quiet` option. Not exposed to the underlying command."""
+def _quiet_callback(context: click.Context, parameter: click.Parameter, value: Any):
+    """Stores the `quiet` flag, unless overridden by the debug mode."""
+    state = _state(context)
+    if value is not None:
+        state.quiet = value
+    if state.debug:
+        state.quiet = False
+    return state.quiet
 
-    def callback(context: click.Context, parameter: click.Parameter, value: Any):
-        state = context.ensure_object(AppState)
-        if value is not None:
-            state.quiet = value
-        if state.debug:
-            state.quiet = False
-        return state.quiet
 
+def quiet_option(function: Callable):
+    """Decorator for the `quiet` option. Not exposed to the underlying command."""
     return click.option(
         "--quiet",
         is_flag=True,
         default=None,  # Must be None
-        callback=callback,
+        callback=_quiet_callback,
         expose_value=False,  # Must be False
         is_eager=False,  # Must be False
         help="Quite mode. Suppresses all animations and status related output.",
     )(function)
 
 
-def requirements_argument(function: Callable):
-    def callback(context: click.Context, parameter: click.Parameter, value: Any):
-        state = context.ensure_object(AppState)
-        if value:
-            state.requirements.update(value)
-        if not state.requirements:
-            raise click.BadParameter("Missing option")
-        return state.requirements
+def _requirements_callback(
+    context: click.Context, parameter: click.Parameter, value: Any
+):
+    """Adds the requirements to the application state, at least one is needed."""
+    state = _state(context)
+    if value:
+        state.requirements += tuple(value)
+    if not state.requirements:
+        raise click.BadParameter("Missing option")
+    return state.requirements
 
+
+def requirements_argument(function: Callable):
     return click.argument(
         "requirements",
         nargs=-1,
         type=click.types.STRING,
-        callback=callback,
+        callback=_requirements_callback,
         is_eager=False,  # Must be False
         expose_value=False,  # Must be False
     )(function)
@@ -255,41 +586,65 @@ def subdirs_option(function: Callable):
     Options specified on the command line are added to 'subdirs` list in the
     configuration file.
     """
-
-    def callback(context: click.Context, parameter: click.Parameter, value: Any):
-        state = context.ensure_object(AppState)
-        if value:
-            state.subdirs.update(value)
-        return state.subdirs
-
     return click.option(
         "--subdir",
         "subdirs",
         multiple=True,
-        type=click.types.Choice(_KNOWN_SUBDIRS),
-        callback=callback,
-        default=_DEFAULT_SUBDIRS,
+        type=_SUBDIRS_CHOICE,
+        callback=_state_callback("subdirs", merge=True),
         metavar="SUBDIR",
-        show_default=True,
+        # Not an actual default, it would be merged into configuration file subdirs.
+        # Without any subdirs the defaults are selected when the command runs.
+        show_default=", ".join(_DEFAULT_SUBDIRS),
         expose_value=False,  # Must be False
         is_eager=False,  # Must be False
-        help=(
-            "Selected platform sub-directories. Multiple options may be passed at "
-            f"one time. Allowed values: {{{', '.join(_ALLOWED_SUBDIRS)}}}."
-        ),
+        help=_SUBDIRS_HELP,
     )(function)
 
 
-def target_callback(context: click.Context, parameter: click.Parameter, value: Any):
-    """Callback function for `target` options."""
-    state = context.ensure_object(AppState)
-    if value:
-        state.target = value
-    return state.target
+def search_options(function: Callable):
+    """Decorator for the options shared by all package search sub-commands.
+
+    Applies the `requirements` argument as well as the `channel`, `exclude`,
+    `dispose`, `subdir`, `config`, `quiet` and `debug` options (in that order).
+    """
+    for decorator in (
+        debug_option,
+        quiet_option,
+        configuration_option,
+        subdirs_option,
+        disposables_option,
+        exclusions_option,
+        channel_option,
+        requirements_argument,
+    ):
+        function = decorator(function)
+    return function
+
+
+# Callback function for `target` options (shared by several sub-commands)
+target_callback = _state_callback("target")
+
+
+class _AppCommand(RichCommand):
+    """Sub-command that reports application exceptions to the user."""
+
+    def invoke(self, ctx: click.Context) -> Any:
+        try:
+            return super().invoke(ctx)
+        except CondaReplicateException as exception:
+            _process_application_exception(exception)
+            ctx.exit(1)
+
+
+class _App(RichGroup):
+    """Root command, all sub-commands report application exceptions uniformly."""
+
+    command_class = _AppCommand
 
 
 # Root command
-@click.group()
+@click.group(cls=_App)
 @click.decorators.version_option(prog_name="conda-local", version=__version__)
 def app():
     """Synthesize local anaconda channels from upstream sources."""
@@ -298,8 +653,6 @@ def app():
 
 # Sub-command: query
 @app.command(short_help="Search an upstream channel for packages and report results.")
-@requirements_argument
-@channel_option
 @click.option(
     "-t",
     "--target",
@@ -314,24 +667,15 @@ def app():
         "(additions or deletions) will be reported to the user."
     ),
 )
-@exclusions_option
-@disposables_option
-@subdirs_option
 @click.option(
     "--output",
     default="table",
     metavar="OUTPUT",
-    type=click.types.Choice(["table", "list", "json"]),
-    help=(
-        "Specifies the format of the search results. Allowed values: "
-        "{table, list, json}."
-    ),
+    type=_OUTPUT_CHOICE,
+    help=_OUTPUT_HELP,
 )
-@configuration_option
-@quiet_option
-@debug_option
+@search_options
 @pass_state
-@pydantic.validate_arguments
 def query(state: AppState, output: str):
     """
     Search an upstream channel for the specified package REQUIREMENTS and report
@@ -351,24 +695,19 @@ def query(state: AppState, output: str):
     configuration file
 
     """  # noqa: E501
-    try:
-        run_query(
-            channel_url=state.channel,
-            requirements=sorted(state.requirements),
-            exclusions=sorted(state.exclusions),
-            disposables=sorted(state.disposables),
-            subdirs=sorted(state.subdirs),
-            target_url=state.target,
-            output=output,
-            quiet=state.quiet,
-        )
-    except CondaReplicateException as exception:
-        _process_application_exception(exception)
+    from conda_replicate.core import run_query  # deferred, heavy imports
+
+    run_query(
+        channel_url=state.channel,
+        **_search_parameters(state),
+        target_url=state.target,
+        output=output,
+        quiet=state.quiet,
+    )
 
 
 # Sub-command: update
 @app.command(short_help="Update a local channel from an upstream channel.")
-@requirements_argument
 @click.option(
     "-t",
     "--target",
@@ -382,15 +721,8 @@ def query(state: AppState, output: str):
         "only package differences (additions or deletions) will be updated."
     ),
 )
-@channel_option
-@exclusions_option
-@disposables_option
-@subdirs_option
-@configuration_option
-@quiet_option
-@debug_option
+@search_options
 @pass_state
-@pydantic.validate_arguments
 def update(state: AppState):
     """Update a local channel based on specified upstream package REQUIREMENTS.
 
@@ -413,23 +745,18 @@ def update(state: AppState):
             "Target must be specified as '-t', '--target' or in a configuration file."
         )
 
-    try:
-        run_update(
-            channel_url=state.channel,
-            requirements=sorted(state.requirements),
-            exclusions=sorted(state.exclusions),
-            disposables=sorted(state.disposables),
-            subdirs=sorted(state.subdirs),
-            target_url=state.target,
-            quiet=state.quiet,
-        )
-    except CondaReplicateException as exception:
-        _process_application_exception(exception)
+    from conda_replicate.core import run_update  # deferred, heavy imports
+
+    run_update(
+        channel_url=state.channel,
+        **_search_parameters(state),
+        target_url=state.target,
+        quiet=state.quiet,
+    )
 
 
 # Sub-command: patch
 @app.command(short_help="Create a patch from an upstream channel.")
-@requirements_argument
 @click.option(
     "-t",
     "--target",
@@ -456,15 +783,8 @@ def update(state: AppState):
     type=click.types.Path(dir_okay=True, resolve_path=True),
     help="Parent directory of the patch. [current directory]",
 )
-@channel_option
-@exclusions_option
-@disposables_option
-@subdirs_option
-@configuration_option
-@quiet_option
-@debug_option
+@search_options
 @pass_state
-@pydantic.validate_arguments
 def patch(state: AppState, name: str, parent: str):
     """Create a patch from an upstream channel based on specified package REQUIREMENTS.
 
@@ -484,20 +804,16 @@ def patch(state: AppState, name: str, parent: str):
     - Requirements specified on the command line *augment* those specified in a
     configuration file
     """  # noqa: E501
-    try:
-        run_patch(
-            channel_url=state.channel,
-            requirements=sorted(state.requirements),
-            exclusions=sorted(state.exclusions),
-            disposables=sorted(state.disposables),
-            subdirs=sorted(state.subdirs),
-            name=name,
-            parent=parent,
-            target_url=state.target,
-            quiet=state.quiet,
-        )
-    except CondaReplicateException as exception:
-        _process_application_exception(exception)
+    from conda_replicate.core import run_patch  # deferred, heavy imports
+
+    run_patch(
+        channel_url=state.channel,
+        **_search_parameters(state),
+        name=name,
+        parent=parent,
+        target_url=state.target,
+        quiet=state.quiet,
+    )
 
 
 # Sub-command: merge
@@ -515,13 +831,11 @@ def patch(state: AppState, name: str, parent: str):
 @quiet_option
 @debug_option
 @pass_state
-@pydantic.validate_arguments
 def merge(state: AppState, patch: str, channel: str):
     """Merge a PATCH into a local CHANNEL and update the local package index."""
-    try:
-        run_merge(patch, channel, quiet=state.quiet)
-    except CondaReplicateException as exception:
-        _process_application_exception(exception)
+    from conda_replicate.core import run_merge  # deferred, heavy imports
+
+    run_merge(patch, channel, quiet=state.quiet)
 
 
 # Sub-command: index
@@ -534,15 +848,28 @@ def merge(state: AppState, patch: str, channel: str):
 @quiet_option
 @debug_option
 @pass_state
-@pydantic.validate_arguments
 def index(state: AppState, channel: str):
     """Update the package index of a local CHANNEL."""
-    try:
-        run_index(channel_url=channel, quiet=state.quiet)
-    except CondaReplicateException as exception:
-        _process_application_exception(exception)
+    from conda_replicate.core import run_index  # deferred, heavy imports
+
+    run_index(channel_url=channel, quiet=state.quiet)
+
+
+def _search_parameters(state: AppState) -> Dict[str, Tuple[str, ...]]:
+    """Returns the (sorted and immutable) package search parameters of the state."""
+    return {
+        "requirements": tuple(sorted(set(state.requirements))),
+        "exclusions": tuple(sorted(set(state.exclusions))),
+        "disposables": tuple(sorted(set(state.disposables))),
+        "subdirs": tuple(sorted(set(state.subdirs))),
+    }
 
 
 def _process_application_exception(exception: CondaReplicateException) -> None:
-    click.secho("\n\n ERROR: ", fg="red", bold=True, nl=False)
-    click.secho(exception.args[0])
+    """Reports an application exception to the user (on stderr)."""
+    message = exception.args[0]
+    if _STDERR_IS_TTY:
+        click.secho("\n\n ERROR: ", fg="red", bold=True, nl=False, err=True)
+        click.secho(message, err=True)
+    else:
+        sys.stderr.write(f"\n\n ERROR: {message}\n")
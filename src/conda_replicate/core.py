@@ -1,6 +1,6 @@
 import datetime
 import os
-from typing import Iterable, Optional, Set, Tuple
+from typing import FrozenSet, Iterable, Optional, Set, Tuple
 
 from rich.console import Console
 from rich.table import Table
@@ -10,6 +10,7 @@ from conda_replicate.adapters.channel import LocalCondaChannel
 from conda_replicate.adapters.package import CondaPackage
 from conda_replicate.adapters.subdir import get_default_subdirs
 from conda_replicate.display import Display
+from conda_replicate.group import groupby
 from conda_replicate.output import print_output
 from conda_replicate.resolve import Parameters
 from conda_replicate.resolve import Resolver
@@ -22,7 +23,7 @@ def find_packages(
     disposables: Iterable[str],
     subdirs: Iterable[str],
     target: Optional[CondaChannel] = None,
-) -> Tuple[Set[CondaPackage], Set[CondaPackage]]:
+) -> Tuple[FrozenSet[CondaPackage], Set[CondaPackage]]:
     """Performs package resolution on an anaconda channel based on specified parameters.
 
     Args:
@@ -48,17 +49,26 @@ def find_packages(
         A tuple of packages to add and packages to remove.
     """
 
-    parameters = Parameters(requirements, exclusions, disposables, subdirs)
-    resolver = Resolver(channel)
-    packages = set(resolver.resolve(parameters))
+    requirements = tuple(requirements)
+    if requirements:
+        parameters = Parameters(requirements, exclusions, disposables, subdirs)
+        resolver = Resolver(channel)
+        packages = resolver.resolve(parameters)
+    else:
+        packages = frozenset()  # nothing is required, nothing to resolve
 
-    to_add, to_remove = set(), set()
+    to_remove: Set[CondaPackage] = set()
     if target is None or not target.is_queryable:
         to_add = packages
     else:
-        existing_packages = set(target.iter_packages(subdirs))
-        to_add = packages - existing_packages
-        to_remove = existing_packages - packages
+        # Stream the target packages rather than materializing them all
+        existing = set()
+        for package in target.iter_packages(subdirs):
+            if package in packages:
+                existing.add(package)
+            else:
+                to_remove.add(package)
+        to_add = packages - existing if existing else packages
 
     return to_add, to_remove
 
@@ -76,11 +86,14 @@ def run_patch(
 ) -> None:
     channel = CondaChannel(channel_url)
     target = CondaChannel(target_url) if target_url else None
-    subdirs = subdirs if subdirs else get_default_subdirs()
+    subdirs = list(subdirs) if subdirs else get_default_subdirs()
 
     if not name:
         now = datetime.datetime.now()
-        name = f"patch_{now.strftime('%Y%m%d_%H%M%S')}"
+        name = (
+            f"patch_{now.year:04d}{now.month:02d}{now.day:02d}"
+            f"_{now.hour:02d}{now.minute:02d}{now.second:02d}"
+        )
     path = os.path.join(parent, name)
     destination = LocalCondaChannel(path)
     destination.setup()
@@ -106,12 +119,17 @@ def run_patch(
         )
 
     if to_add:
-        for package in display.progress(to_add, "Downloading packages"):
-            destination.add_package(package)
-
-    for subdir in display.progress(subdirs, "Updating patch instructions"):
-        instructions = channel.read_instructions(subdir)
-        instructions.remove.extend(pkg.fn for pkg in to_remove)
+        added = destination.add_packages(to_add)
+        for _ in display.progress(added, "Downloading packages", total=len(to_add)):
+            pass
+
+    # Removals only apply to the platform sub-directory of the package
+    removals = groupby(to_remove, lambda package: package.subdir)
+    updates = channel.iter_instructions(subdirs)
+    for subdir, instructions in display.progress(
+        updates, "Updating patch instructions", total=len(subdirs)
+    ):
+        instructions.remove.extend(sorted(pkg.fn for pkg in removals.get(subdir, [])))
         destination.write_instructions(subdir, instructions)
 
     with display.status("Creating patch generator"):
@@ -139,11 +157,11 @@ def run_query(
 
     channel = CondaChannel(channel_url)
     target = LocalCondaChannel(target_url) if target_url else None
-    subdirs = subdirs if subdirs else get_default_subdirs()
+    subdirs = list(subdirs) if subdirs else get_default_subdirs()
 
     quiet = output == "json"  # disable animation for json
     console = Console(quiet=quiet, color_system="windows")
-    display = Display(console)
+    display = Display(console, disable=quiet)
 
     table = Table(show_header=False, box=None)
     table.add_row("Channel", channel.url)
@@ -152,9 +170,6 @@ def run_query(
     console.print(table)
     console.print("")
 
-    disable = output == "json"  # disable animation for json
-    display = Display(console, disable)
-
     with display.status("Searching for packages"):
         to_add, to_remove = find_packages(
             channel=channel,
@@ -181,7 +196,7 @@ def run_update(
 
     channel = CondaChannel(channel_url)
     target = LocalCondaChannel(target_url)
-    subdirs = subdirs if subdirs else get_default_subdirs()
+    subdirs = list(subdirs) if subdirs else get_default_subdirs()
 
     console = Console(quiet=quiet, color_system="windows")
     display = Display(console)
@@ -204,15 +219,18 @@ def run_update(
         )
 
     if to_add:
-        for package in display.progress(to_add, "Downloading packages"):
-            target.add_package(package)
+        added = target.add_packages(to_add)
+        for _ in display.progress(added, "Downloading packages", total=len(to_add)):
+            pass
 
     if to_remove:
-        for package in display.progress(to_remove, "Removing packages"):
-            target.remove_package(package)
+        with display.status("Removing packages"):
+            target.remove_packages(to_remove)
 
-    for subdir in display.progress(subdirs, "Updating patch instructions"):
-        instructions = channel.read_instructions(subdir)
+    updates = channel.iter_instructions(subdirs)
+    for subdir, instructions in display.progress(
+        updates, "Updating patch instructions", total=len(subdirs)
+    ):
         target.write_instructions(subdir, instructions)
 
     with display.status("Creating patch generator"):
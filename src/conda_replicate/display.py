@@ -1,10 +1,8 @@
 import contextlib
 import sys
 import time
-from typing import Iterable, Iterator, Optional, TypeVar
+from typing import Iterable, Iterator, Optional, Sized, TypeVar
 
-import conda_build.index
-import tqdm
 from rich.console import Console
 from rich.control import Control
 
@@ -41,14 +39,30 @@ class Display:
         else:
             self.disable = True
 
-    def progress(self, items: Iterable[T], message) -> Iterator[T]:
-        """Iterates over items with progress bar."""
+    def progress(
+        self, items: Iterable[T], message: str, total: Optional[int] = None
+    ) -> Iterator[T]:
+        """Iterates over items with progress bar.
+
+        Args:
+            items: An iterable of items; sized collections are not required.
+            message: Description displayed alongside the progress bar.
+            total (optional): Expected number of items. If None, the length of
+                `items` is used when available, otherwise the progress bar is
+                displayed in an indeterminate mode.
+        """
+        import tqdm  # deferred, only needed once progress is displayed
+
         message = self._parse_message(message)
         start = time.time()
 
+        if total is None and isinstance(items, Sized):
+            total = len(items)
+
         yield from tqdm.tqdm(
             items,
             desc=message,
+            total=total,
             bar_format=STANDARD_BAR_FORMAT,
             # colour="cyan",
             disable=self.disable,
@@ -80,6 +94,8 @@ class Display:
     def status_monkeypatch_conda_index(self, message: str) -> Iterator[None]:
         """Context for temporarily monkeypatch of the conda index progress."""
         # NOTE: Yes, I hate this as much as you do.
+        import conda_build.index  # deferred, expensive and only used for indexing
+        import tqdm
 
         def patched_tqdm(*args, **kwargs):
             # kwargs["ascii"] = True
@@ -1,10 +1,9 @@
-from collections import defaultdict
-from typing import Callable, Iterable, Mapping, TypeVar
+from typing import Callable, Dict, Iterable, List, TypeVar
 
 _TKey = TypeVar("_TKey")
 _TValue = TypeVar("_TValue")
 
-Grouping = Mapping[_TKey, Iterable[_TValue]]
+Grouping = Dict[_TKey, List[_TValue]]
 
 
 def groupby(
@@ -17,10 +16,15 @@ def groupby(
         func: A function that generates the key used to group items.
 
     Returns:
-        The original items grouped by the results of the specified function.
+        The original items (in their original order) grouped by the results of
+        the specified function. Missing keys are not created on access.
     """
-    grouping = defaultdict(set)
+    grouping: Grouping[_TKey, _TValue] = {}
     for item in items:
         key = func(item)
-        grouping[key].add(item)
+        group = grouping.get(key)
+        if group is None:
+            grouping[key] = [item]
+        else:
+            group.append(item)
     return grouping
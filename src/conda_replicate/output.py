@@ -1,5 +1,5 @@
 import json
-from typing import Iterable
+from typing import Callable, Dict, Iterable
 
 from rich import box
 from rich.console import Console
@@ -12,15 +12,23 @@ from conda_replicate.group import groupby
 def print_output(
     output: str, to_add: Iterable[CondaPackage], to_remove: Iterable[CondaPackage]
 ) -> None:
+    printer = _OUTPUT_PRINTERS.get(output)
+    if printer is not None:
+        printer(to_add, to_remove)
 
-    if output == "table":
-        _print_output_table(to_add, "Packages to add   ")
-        _print_output_table(to_remove, "Packages to remove")
-    elif output == "list":
-        _print_output_list(to_add, "Packages to add")
-        _print_output_list(to_remove, "Packages to remove")
-    elif output == "json":
-        _print_output_json(to_add, to_remove)
+
+def _print_table(
+    to_add: Iterable[CondaPackage], to_remove: Iterable[CondaPackage]
+) -> None:
+    _print_output_table(to_add, "Packages to add   ")
+    _print_output_table(to_remove, "Packages to remove")
+
+
+def _print_list(
+    to_add: Iterable[CondaPackage], to_remove: Iterable[CondaPackage]
+) -> None:
+    _print_output_list(to_add, "Packages to add")
+    _print_output_list(to_remove, "Packages to remove")
 
 
 def _print_output_table(records: Iterable[CondaPackage], label: str) -> None:
@@ -30,7 +38,7 @@ def _print_output_table(records: Iterable[CondaPackage], label: str) -> None:
     rows = []
     groups = groupby(records, lambda record: record.name)
     for group in groups:
-        number = len(list(groups[group]))
+        number = len(groups[group])
         size = sum(record.size for record in groups[group]) / 10**6
         row = (size, number, group)
         rows.append(row)
@@ -59,10 +67,19 @@ def _print_output_list(records: Iterable[CondaPackage], label: str) -> None:
 def _print_output_json(
     to_add: Iterable[CondaPackage], to_remove: Iterable[CondaPackage]
 ) -> None:
-    console = Console(quiet=False)
     data = {
         "add": [record.dump() for record in to_add],
         "remove": [record.dump() for record in to_remove],
     }
-    text = json.dumps(data, indent=4)
-    console.print(text)
+    # Written as is, json must not be subject to rich markup, highlighting or wrapping
+    print(json.dumps(data, indent=4))
+
+
+# Output printers, selected by the name of the output format
+_OUTPUT_PRINTERS: Dict[
+    str, Callable[[Iterable[CondaPackage], Iterable[CondaPackage]], None]
+] = {
+    "table": _print_table,
+    "list": _print_list,
+    "json": _print_output_json,
+}
@@ -1,9 +1,8 @@
 from __future__ import annotations
 
 import logging
-from typing import Any, Iterable, Iterator, Set, Tuple
-
-import networkx as nx
+import sys
+from typing import Any, Dict, FrozenSet, Hashable, Iterable, Iterator, List, Set, Tuple
 
 from conda_replicate import CondaReplicateException
 from conda_replicate.adapters.channel import CondaChannel
@@ -15,19 +14,24 @@ log = logging.getLogger(__name__)
 
 
 class Resolver:
-    """Channel based package and dependency resolution."""
+    """Channel based package and dependency resolution.
 
-    _root_attribute = "root"
+    Args:
+        source: Channel used to query packages.
+        threaded (optional): If True, channel platform sub-directories are queried
+            concurrently. Disable for deterministic debugging.
+    """
 
-    def __init__(self, source: CondaChannel) -> None:
+    def __init__(self, source: CondaChannel, threaded: bool = True) -> None:
         self.source = source
+        self.threaded = threaded
 
-    def resolve(self, parameters: Parameters) -> Tuple[CondaPackage, ...]:
+    def resolve(self, parameters: Parameters) -> FrozenSet[CondaPackage]:
         """Execute the resolution algorithm using specified parameters."""
 
         graph, roots = self._construct_graph(parameters)
 
-        log.debug("Initial graph G(V%d, E=%d)", len(graph.nodes), len(graph.edges))
+        log.debug("Initial graph G(V=%d, E=%d)", len(graph), graph.number_of_edges)
 
         self._prune_unsatisfied_nodes(graph)
 
@@ -35,12 +39,12 @@ class Resolver:
 
         self._prune_disconnected_nodes(graph, roots)
 
-        log.debug("Pruned graph G(V=%d, E=%d)", len(graph.nodes), len(graph.edges))
+        log.debug("Pruned graph G(V=%d, E=%d)", len(graph), graph.number_of_edges)
 
         packages = self._extract_packages(graph, parameters)
         return packages
 
-    def _construct_graph(self, parameters: Parameters) -> Tuple[nx.DiGraph, Set[str]]:
+    def _construct_graph(self, parameters: Parameters) -> Tuple[_Graph, Set[str]]:
         """Returns the main resolution graph and root nodes from given parameters.
 
         The resolution graph is a directed graph made of alternating levels of match
@@ -50,123 +54,207 @@ class Resolver:
         graph unless a package is determined to be constrained via the parameters.
         """
 
-        graph = nx.DiGraph()
+        graph = _Graph()
         roots: Set[str] = set()
 
-        # Note: for efficiently, use the specification strings (value) in the graph
-        specs_to_process: Set[str] = set(req.value for req in parameters.requirements)
-        specs_processed: Set[str] = set()
+        # Note: for efficiently, use the specification strings (value) in the graph.
+        # Specifications are marked as seen when discovered, so the frontier (kept
+        # in discovery order) never holds duplicates.
+        specs_to_process: List[str] = []
+        specs_seen: Set[str] = set()
 
-        for spec in specs_to_process:
+        for spec in (sys.intern(req.value) for req in parameters.requirements):
+            if spec in specs_seen:
+                continue
             log.debug("Adding root node: %s", spec)
-            graph.add_node(spec, root=True)
+            graph.add_node(spec)
             roots.add(spec)
+            specs_seen.add(spec)
+            specs_to_process.append(spec)
 
         while specs_to_process:
-            spec = specs_to_process.pop()
-            specs_processed.add(spec)
-            log.debug("Processing spec %s", spec)
-
-            for package in self._query_channel(spec, parameters):
-                if parameters.is_constrained(package):
-                    log.debug("Ignoring constrained package: %s", package)
-                    continue
+            # Specifications are processed (and queried) one layer at a time
+            layer, specs_to_process = specs_to_process, []
 
-                if package not in graph:
-                    graph.add_node(package)
+            for spec, packages in self._query_channel(layer, parameters).items():
+                log.debug("Processing spec %s", spec)
 
-                log.debug("Connecting spec %s to package %s", spec, package)
-                graph.add_edge(spec, package)
+                for package in packages:
+                    if parameters.is_constrained(package):
+                        log.debug("Ignoring constrained package: %s", package)
+                        continue
 
-                for depend in package.depends:
-                    if depend not in graph:
-                        graph.add_node(depend)
+                    log.debug("Connecting spec %s to package %s", spec, package)
+                    graph.add_edge(spec, package)
 
-                    log.debug("Connecting package %s to spec %s", package, depend)
-                    graph.add_edge(package, depend)
+                    for depend in package.depends:
+                        depend = sys.intern(depend)  # shared across many packages
+                        log.debug("Connecting package %s to spec %s", package, depend)
+                        graph.add_edge(package, depend)
 
-                    if depend not in specs_processed:
-                        specs_to_process.add(depend)
+                        if depend not in specs_seen:
+                            specs_seen.add(depend)
+                            specs_to_process.append(depend)
 
         return graph, roots
 
     def _query_channel(
-        self, spec: str, parameters: Parameters
-    ) -> Iterator[CondaPackage]:
-        """Yields conda package for the specified channel query."""
-        yield from self.source.query_packages(spec, subdirs=parameters.subdirs)
-
-    def _prune_unsatisfied_nodes(self, graph: nx.DiGraph) -> None:
-        """Prune unsatisfied nodes - specification nodes with no successors."""
+        self, specs: Iterable[str], parameters: Parameters
+    ) -> Dict[str, Tuple[CondaPackage, ...]]:
+        """Returns conda packages for each of the specified channel queries."""
+        return self.source.query_packages_many(
+            specs, subdirs=parameters.subdirs, threaded=self.threaded
+        )
+
+    def _prune_unsatisfied_nodes(self, graph: _Graph) -> None:
+        """Prune unsatisfied nodes - specification nodes with no successors.
+
+        Removing an unsatisfied specification also removes the packages that depend
+        on it, which can leave further specifications unsatisfied. This cascade is
+        driven by an explicit worklist instead of recursion.
+        """
         log.debug("Pruning unsatisfied nodes")
-        for node in set(graph):
-            self._prune_unsatisfied_node(graph, node)
 
-    def _prune_unsatisfied_node(self, graph: nx.DiGraph, node: Any) -> None:
-        """Prune a single unsatisfied specification node."""
-
-        if not isinstance(node, str):
-            return
-        if node not in graph:
-            return
-        if list(graph.successors(node)):
-            return
-
-        log.debug("Removing unsatisfied spec: %s", node)
-        parents = list(graph.predecessors(node))
-        graph.remove_node(node)
-
-        for parent in parents:
-            if parent not in graph:
+        # Only specifications that are already unsatisfied can start a cascade
+        worklist: List[Hashable] = [
+            spec for spec in graph.specs if not graph.successors[spec]
+        ]
+        while worklist:
+            node = worklist.pop()
+            if node not in graph:
+                continue
+            if graph.successors[node]:
                 continue
 
-            log.debug("Removing package with missing dependency: %s", parent)
-            grandparents = list(graph.predecessors(parent))
-            graph.remove_node(parent)
+            log.debug("Removing unsatisfied spec: %s", node)
+            parents = graph.remove_node(node)
 
-            for grandparent in grandparents:
-                self._prune_unsatisfied_node(graph, grandparent)
+            for parent in parents:
+                if parent not in graph:
+                    continue
+
+                log.debug("Removing package with missing dependency: %s", parent)
+                worklist.extend(graph.predecessors[parent])
+                graph.remove_node(parent)
 
-    def _prune_disconnected_nodes(self, graph: nx.DiGraph, roots: Set[str]) -> None:
-        """Prune disconnected nodes - nodes without a path to at least one root node."""
+    def _prune_disconnected_nodes(self, graph: _Graph, roots: Set[str]) -> None:
+        """Prune disconnected nodes - nodes without a path to at least one root node.
 
-        connected = set()
-        for root in roots:
-            connected.update(nx.dfs_preorder_nodes(graph, root))
+        All roots are traversed together, so nodes shared between roots are only
+        visited once.
+        """
+        connected = graph.reachable(roots)
 
-        disconnected = set(graph.nodes) - connected
+        disconnected = [node for node in graph if node not in connected]
         for node in disconnected:
             log.debug("Pruning disconnected node: %s", node)
             graph.remove_node(node)
 
-    def _verify_roots(self, graph: nx.DiGraph, roots: Set[str]) -> None:
+    def _verify_roots(self, graph: _Graph, roots: Set[str]) -> None:
         """Verifies that the graph contains the specified root nodes."""
         missing = set(root for root in roots if root not in graph)
         if missing:
             raise UnsatisfiedRequirementsError(missing)
 
     def _extract_packages(
-        self, graph: nx.DiGraph, parameters: Parameters
-    ) -> Tuple[CondaPackage, ...]:
+        self, graph: _Graph, parameters: Parameters
+    ) -> FrozenSet[CondaPackage]:
         """Extract conda packages from the resolution graph."""
 
         packages = set()
-        package_names = set()
 
-        for node in graph.nodes:
-            if not isinstance(node, CondaPackage):
-                continue
-
-            package_names.add(node.name)
+        for node in graph.packages:
             if not parameters.is_disposable(node):
                 packages.add(node)
 
-        return tuple(packages)
+        return frozenset(packages)
+
+
+class _Graph:
+    """Minimal directed graph backed by successor and predecessor adjacency sets.
+
+    Specification (string) and package nodes are additionally tracked in separate
+    sets, nodes are classified once when added rather than on every traversal.
+    """
+
+    __slots__ = ("successors", "predecessors", "specs", "packages")
+
+    def __init__(self) -> None:
+        self.successors: Dict[Hashable, Set[Hashable]] = {}
+        self.predecessors: Dict[Hashable, Set[Hashable]] = {}
+        self.specs: Set[str] = set()
+        self.packages: Set[CondaPackage] = set()
+
+    @property
+    def number_of_edges(self) -> int:
+        """Returns the number of edges in the graph."""
+        return sum(len(children) for children in self.successors.values())
+
+    def add_node(self, node: Hashable) -> None:
+        """Adds a node to the graph, existing nodes are left untouched."""
+        if node not in self.successors:
+            self.successors[node] = set()
+            self.predecessors[node] = set()
+            if isinstance(node, str):
+                self.specs.add(node)
+            elif isinstance(node, CondaPackage):
+                self.packages.add(node)
+
+    def add_edge(self, source: Hashable, target: Hashable) -> None:
+        """Adds a directed edge (and any missing nodes) to the graph."""
+        self.add_node(source)
+        self.add_node(target)
+        self.successors[source].add(target)
+        self.predecessors[target].add(source)
+
+    def remove_node(self, node: Hashable) -> Set[Hashable]:
+        """Removes a node and all of its incident edges from the graph.
+
+        Returns:
+            The former predecessors of the removed node.
+        """
+        self.specs.discard(node)
+        self.packages.discard(node)
+        for child in self.successors.pop(node):
+            self.predecessors[child].discard(node)
+        parents = self.predecessors.pop(node)
+        for parent in parents:
+            self.successors[parent].discard(node)
+        return parents
+
+    def reachable(self, sources: Iterable[Hashable]) -> Set[Hashable]:
+        """Returns all nodes reachable from the source nodes (including themselves)."""
+        visited = set(sources)
+        stack = list(visited)
+        while stack:
+            for child in self.successors[stack.pop()]:
+                if child not in visited:
+                    visited.add(child)
+                    stack.append(child)
+        return visited
+
+    def __contains__(self, node: Any) -> bool:
+        return node in self.successors
+
+    def __iter__(self) -> Iterator[Hashable]:
+        return iter(self.successors)
+
+    def __len__(self) -> int:
+        return len(self.successors)
 
 
 class Parameters:
     """Defines the parameters used in package resolution."""
 
+    __slots__ = (
+        "_flat_requirements",
+        "_requirements",
+        "_exclusions",
+        "_disposables",
+        "_subdirs",
+        "_constrained_names",
+    )
+
     def __init__(
         self,
         requirements: Iterable[str],
@@ -180,6 +268,10 @@ class Parameters:
         self._disposables = groupby(_make_specs(disposables), lambda spec: spec.name)
         self._subdirs = tuple(subdirs)
 
+        # Most packages (transitive dependencies) have no user-supplied constraints
+        required_names = frozenset(self._requirements)
+        self._constrained_names = required_names | frozenset(self._exclusions)
+
     @property
     def requirements(self) -> Tuple[CondaSpecification, ...]:
         """Returns anaconda match specifications for required packages."""
@@ -191,8 +283,25 @@ class Parameters:
         return self._subdirs
 
     def is_constrained(self, package: CondaPackage) -> bool:
-        """Returns True if a constrained (excluded from package resolution)."""
+        """Returns True if a constrained (excluded from package resolution).
+
+        Match results are cached by the specifications themselves, and only where
+        equal packages (e.g. `.tar.bz2` and `.conda`) cannot match differently.
+        """
+        if package.name not in self._constrained_names:
+            return False
 
+        return self._is_constrained(package)
+
+    def is_disposable(self, package: CondaPackage) -> bool:
+        """Returns True if a disposable (removable after package resolution)."""
+        disposables = self._disposables.get(package.name)
+        if not disposables:
+            return False
+
+        return any(disposable.match(package) for disposable in disposables)
+
+    def _is_constrained(self, package: CondaPackage) -> bool:
         requirements = self._requirements.get(package.name, [])
         if not all(spec.match(package) for spec in requirements):
             return True
@@ -203,11 +312,6 @@ class Parameters:
 
         return False
 
-    def is_disposable(self, package: CondaPackage) -> bool:
-        """Returns True if a disposable (removable after package resolution)."""
-        disposables = self._disposables.get(package.name, [])
-        return any(disposable.match(package) for disposable in disposables)
-
 
 class UnsatisfiedRequirementsError(CondaReplicateException):
     """Exception raised when required specifications could not be satisfied."""
@@ -1,17 +1,29 @@
+import hashlib
 import json
+import os
+import threading
 from dataclasses import dataclass
 from dataclasses import field
 from pathlib import Path
 from typing import List, Set
 
 import pytest
+import conda.api
 import yaml
+from conda.base.context import context
+from conda.exports import PackageRecord
 
+from conda_replicate.adapters.channel import BadPackageDownload
 from conda_replicate.adapters.channel import CondaChannel
-
-# from conda_replicate.adapters.channel import LocalCondaChannel
+from conda_replicate.adapters.channel import CondaFilesystem
+from conda_replicate.adapters.channel import LocalCondaChannel
+from conda_replicate.adapters.channel import RepoData
+from conda_replicate.adapters.channel import _iter_json
+from conda_replicate.adapters.package import CondaPackage
 from tests.utils import get_test_data_path
 
+CONTENTS = b"fake package contents"
+
 
 @dataclass
 class TestData:
@@ -31,6 +43,40 @@ class TestData:
         return filenames
 
 
+def make_package(path: Path, contents: bytes = CONTENTS) -> CondaPackage:
+    """Writes a fake package file to a source directory and returns its package."""
+    source = path / "source" / "noarch" / "fake-1.0-0.tar.bz2"
+    source.parent.mkdir(parents=True, exist_ok=True)
+    source.write_bytes(contents)
+    record = PackageRecord(
+        name="fake",
+        version="1.0",
+        build="0",
+        build_number=0,
+        sha256=hashlib.sha256(CONTENTS).hexdigest(),
+        size=len(CONTENTS),
+        subdir="noarch",
+        fn=source.name,
+        url=source.as_uri(),
+        channel="source",
+    )
+    return CondaPackage(record)
+
+
+@pytest.fixture
+def count_checksums(monkeypatch: pytest.MonkeyPatch) -> List[str]:
+    """Records the filenames of all package files that are hashed."""
+    calls: List[str] = []
+    checksum = CondaFilesystem.checksum
+
+    def wrapper(self, subdir: str, filename: str) -> bytes:
+        calls.append(filename)
+        return checksum(self, subdir, filename)
+
+    monkeypatch.setattr(CondaFilesystem, "checksum", wrapper)
+    return calls
+
+
 @pytest.fixture
 def testdata(request) -> TestData:
     path = get_test_data_path() / "channels" / request.param
@@ -95,3 +141,211 @@ def tests_conda_channel_query_packages(testdata: TestData, query: str):
         fn for fn in testdata.get_package_filenames() if fn.startswith(query + "-")
     )
     assert actual == expected
+
+
+@pytest.mark.parametrize(
+    "testdata", ["complete_nopython", "complete_python"], indirect=True
+)
+def tests_conda_channel_query_packages_many(testdata: TestData):
+    path = testdata.path
+    specs = ["python", "sqlite", "does-not-exist"]
+    subdirs = ["noarch", "win-64"]
+    channel = CondaChannel(path.as_uri())
+
+    unthreaded = channel.query_packages_many(specs, subdirs, threaded=False)
+    threaded = channel.query_packages_many(specs, subdirs, threaded=True)
+
+    assert set(unthreaded) == set(specs)
+    assert threaded == unthreaded
+    for spec in specs:
+        expected = set(channel.query_packages(spec, subdirs))
+        assert set(unthreaded[spec]) == expected
+    assert unthreaded["does-not-exist"] == ()
+
+
+@pytest.mark.parametrize("testdata", ["complete_python"], indirect=True)
+def tests_conda_channel_query_packages_many_queries_in_worker_threads(
+    testdata: TestData, monkeypatch: pytest.MonkeyPatch
+):
+    threads: Set[int] = set()
+    query = conda.api.SubdirData.query
+
+    def wrapper(self, spec):
+        yield from query(self, spec)
+        threads.add(threading.get_ident())  # thread that consumed the query
+
+    monkeypatch.setattr(conda.api.SubdirData, "query", wrapper)
+    channel = CondaChannel(testdata.path.as_uri())
+    results = channel.query_packages_many(
+        ["python", "sqlite"], ["noarch", "win-64"], threaded=True
+    )
+
+    assert results["python"]
+    assert threads
+    assert threading.get_ident() not in threads
+
+
+@pytest.mark.parametrize("testdata", ["complete_python"], indirect=True)
+def tests_conda_channel_query_packages_many_offline(
+    testdata: TestData, monkeypatch: pytest.MonkeyPatch
+):
+    schemes: List[str] = []
+
+    class SubdirData(conda.api.SubdirData):
+        def __init__(self, channel):
+            schemes.append(channel.scheme)
+            super().__init__(channel)
+
+    monkeypatch.setattr(conda.api, "SubdirData", SubdirData)
+    monkeypatch.setattr(context, "offline", True)
+    specs = ["python", "sqlite"]
+    subdirs = ["noarch", "win-64"]
+
+    # Remote channels are skipped entirely, local channels are still queried
+    remote = CondaChannel("conda-forge")
+    assert remote.query_packages_many(specs, subdirs) == {"python": (), "sqlite": ()}
+    assert schemes == []
+
+    local = CondaChannel(testdata.path.as_uri())
+    results = local.query_packages_many(specs, subdirs, threaded=True)
+    assert set(results["python"]) == set(local.query_packages("python", subdirs))
+    assert results["python"]
+    assert schemes == ["file", "file"]
+
+
+def test_local_conda_channel_trusts_unchanged_verified_packages(
+    tmp_path: Path, count_checksums: List[str]
+):
+    package = make_package(tmp_path)
+    channel = LocalCondaChannel(tmp_path / "channel")
+    channel.add_package(package)
+
+    assert (channel.path / ".verified.json").exists()
+    assert not (channel.path / ".verified.json.partial").exists()
+
+    # A fresh channel reads the persisted verification records
+    channel = LocalCondaChannel(tmp_path / "channel")
+    channel.add_package(package)
+
+    assert count_checksums == []
+
+
+def test_local_conda_channel_hashes_packages_with_changed_mtime(
+    tmp_path: Path, count_checksums: List[str]
+):
+    package = make_package(tmp_path)
+    channel = LocalCondaChannel(tmp_path / "channel")
+    channel.add_package(package)
+
+    destination = channel.path / package.subdir / package.fn
+    stat = destination.stat()
+    os.utime(destination, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10**9))
+
+    channel = LocalCondaChannel(tmp_path / "channel")
+    channel.add_package(package)
+    channel.add_package(package)  # verified again, no further hashing
+
+    assert count_checksums == [package.fn]
+    assert destination.read_bytes() == CONTENTS
+
+
+def test_local_conda_channel_downloads_corrupted_packages_again(tmp_path: Path):
+    package = make_package(tmp_path)
+    channel = LocalCondaChannel(tmp_path / "channel")
+    channel.add_package(package)
+
+    destination = channel.path / package.subdir / package.fn
+    stat = destination.stat()
+    destination.write_bytes(CONTENTS.upper())  # same size, different contents
+    os.utime(destination, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10**9))
+
+    channel = LocalCondaChannel(tmp_path / "channel")
+    channel.add_package(package)
+
+    assert destination.read_bytes() == CONTENTS
+
+
+def test_local_conda_channel_ignores_corrupted_verification_records(
+    tmp_path: Path, count_checksums: List[str]
+):
+    package = make_package(tmp_path)
+    channel = LocalCondaChannel(tmp_path / "channel")
+    channel.add_package(package)
+
+    (channel.path / ".verified.json").write_text("{not json")
+
+    channel = LocalCondaChannel(tmp_path / "channel")
+    channel.add_package(package)
+
+    assert count_checksums == [package.fn]
+    records = json.loads((channel.path / ".verified.json").read_text())
+    assert f"{package.subdir}/{package.fn}" in records
+
+
+def test_local_conda_channel_forgets_removed_packages(tmp_path: Path):
+    package = make_package(tmp_path)
+    channel = LocalCondaChannel(tmp_path / "channel")
+    channel.add_package(package)
+
+    channel.remove_packages([package])
+
+    records = json.loads((channel.path / ".verified.json").read_text())
+    assert f"{package.subdir}/{package.fn}" not in records
+    assert not (channel.path / package.subdir / package.fn).exists()
+
+
+@pytest.mark.parametrize(
+    "contents",
+    [CONTENTS[:-4], CONTENTS.upper()],
+    ids=["truncated", "tampered"],
+)
+def test_conda_channel_rejects_bad_package_downloads(tmp_path: Path, contents: bytes):
+    package = make_package(tmp_path, contents)
+    channel = CondaChannel((tmp_path / "channel").as_uri())
+
+    with pytest.raises(BadPackageDownload):
+        channel.add_package(package)
+
+    subdir = tmp_path / "channel" / package.subdir
+    assert not (subdir / package.fn).exists()
+    assert list(subdir.iterdir()) == []  # no partial download is left behind
+
+
+@pytest.mark.parametrize(
+    "document",
+    [
+        {},
+        {"info": {}},
+        {"info": {"subdir": "noarch"}, "packages": {}, "repodata_version": 1},
+        {
+            "packages": {
+                "a-1.0-0.tar.bz2": {"depends": ["b >=1"], "size": 10, "md5": None},
+                "b-1.0-0.tar.bz2": {"nested": {"deeper": [{}, []]}, "note": "\u00e9"},
+            },
+            "removed": ["c-1.0-0.tar.bz2"],
+        },
+    ],
+    ids=["empty", "empty-nested", "flat", "nested"],
+)
+def test_iter_json_matches_json_dumps(document: dict):
+    assert "".join(_iter_json(document)) == json.dumps(document)
+
+
+def test_conda_channel_repodata_round_trip(tmp_path: Path):
+    channel = CondaChannel((tmp_path / "channel").as_uri())
+    repodata = RepoData.parse_obj(
+        {
+            "info": {"subdir": "noarch"},
+            "packages": {
+                "a-1.0-0.tar.bz2": {"name": "a", "depends": ["b >=1"], "size": 10},
+            },
+            "conda.packages": {"b-1.0-0.conda": {"name": "b", "depends": []}},
+            "removed": ["c-1.0-0.tar.bz2"],
+        }
+    )
+
+    channel.write_repodata("noarch", repodata)
+    actual = channel.read_repodata("noarch")
+
+    assert actual == repodata
+    assert not (tmp_path / "channel" / "noarch" / "repodata.json.partial").exists()
@@ -78,6 +78,12 @@ def test_conda_package_sha256_property(record):
     assert actual == expected
 
 
+def test_conda_package_sha256_digest_property(record):
+    package = CondaPackage(record)
+    assert isinstance(package.sha256_digest, bytes)
+    assert package.sha256_digest.hex() == DATA["sha256"]
+
+
 def test_conda_package_subdirs_property(record):
     package = CondaPackage(record)
     assert isinstance(package.subdir, str)
@@ -1,7 +1,19 @@
+from pathlib import Path
+
 import click.testing
 import pytest
 
+from conda_replicate import cli
+
 
 @pytest.fixture(scope="session")
 def runner():
     return click.testing.CliRunner()
+
+
+@pytest.fixture(autouse=True)
+def configuration_cache(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> Path:
+    """Isolates the on-disk configuration cache from the user cache directory."""
+    cache = tmp_path / "cache" / "configs"
+    monkeypatch.setattr(cli, "_CONFIGURATION_CACHE", cache)
+    return cache
@@ -0,0 +1,179 @@
+from pathlib import Path
+
+import pytest
+import yaml
+
+from conda_replicate import cli
+from conda_replicate.cli import _CONFIGURATION_DEFAULTS
+from conda_replicate.cli import _read_configuration
+
+# Document that sets every known setting, the scan must still read past it
+COMPLETE = "".join(f"{name}: null\n" for name in _CONFIGURATION_DEFAULTS)
+
+
+@pytest.fixture(params=["default", "python"], autouse=True)
+def loader(request, monkeypatch: pytest.MonkeyPatch):
+    if request.param == "python":
+        monkeypatch.setattr(cli, "_yaml_loader", lambda: yaml.SafeLoader)
+
+
+def expected_configuration(text: str):
+    """Returns the known settings of a document loaded in full by `yaml.safe_load`."""
+    contents = yaml.safe_load(text)
+    if not isinstance(contents, dict):
+        return contents
+    return {
+        key: value for key, value in contents.items() if key in _CONFIGURATION_DEFAULTS
+    }
+
+
+@pytest.mark.parametrize(
+    "text",
+    [
+        pytest.param(
+            "channel: conda-forge\n"
+            "requirements: [python >=3.8, pip]\n"
+            "exclusions: []\n",
+            id="flat",
+        ),
+        pytest.param(
+            "unknown:\n"
+            "  nested: {deeper: [1, 2, {channel: ignored}]}\n"
+            "  other: [[requirements]]\n"
+            "channel: conda-forge\n"
+            "more: {a: [b, c]}\n"
+            "subdirs: [linux-64]\n",
+            id="nested-unknown-subtrees",
+        ),
+        pytest.param(
+            "defaults: &defaults [python, pip]\n"
+            "requirements: *defaults\n"
+            "channel: conda-forge\n",
+            id="alias-of-unknown",
+        ),
+        pytest.param(
+            "requirements: &requirements [python]\n"
+            "disposables: *requirements\n",
+            id="alias-of-known",
+        ),
+        pytest.param(
+            "base: &base {channel: conda-forge, subdirs: [noarch]}\n"
+            "<<: *base\n"
+            "requirements: [python]\n",
+            id="merge-key",
+        ),
+        pytest.param(
+            "channel: first\n"
+            "<<: [{channel: merged, exclusions: [pip]}, {subdirs: [linux-64]}]\n",
+            id="merge-key-sequence",
+        ),
+        pytest.param(
+            "channel: first\n"
+            "requirements: [python]\n"
+            "channel: last\n",
+            id="duplicate-keys",
+        ),
+        pytest.param(COMPLETE + "channel: last\n", id="duplicate-after-complete"),
+        pytest.param("", id="empty"),
+        pytest.param("# only a comment\n", id="comment"),
+        pytest.param("- channel\n- requirements\n", id="sequence"),
+        pytest.param("conda-forge\n", id="scalar"),
+    ],
+)
+def test_read_configuration_matches_safe_load(text: str, tmp_path: Path):
+    path = tmp_path / "config.yml"
+    path.write_text(text)
+
+    assert _read_configuration(str(path)) == expected_configuration(text)
+
+
+@pytest.mark.parametrize(
+    "text",
+    [
+        pytest.param("channel: first\n---\nchannel: second\n", id="multi-document"),
+        pytest.param("channel: first\nrequirements: [python\n", id="syntax-error"),
+        pytest.param("channel: first\nunknown: {a: [}\n", id="late-syntax-error"),
+        pytest.param(COMPLETE + "unknown: {a: [}\n", id="error-after-complete"),
+    ],
+)
+def test_read_configuration_raises_like_safe_load(text: str, tmp_path: Path):
+    path = tmp_path / "config.yml"
+    path.write_text(text)
+
+    with pytest.raises(yaml.YAMLError):
+        yaml.safe_load(text)
+    with pytest.raises(ValueError, match="Invalid yaml configuration file"):
+        _read_configuration(str(path))
+
+
+def test_load_configuration_caches_parsed_contents(
+    configuration_cache: Path, tmp_path: Path, monkeypatch: pytest.MonkeyPatch
+):
+    path = tmp_path / "config.yml"
+    path.write_text("channel: conda-forge\nrequirements: [python]\n")
+
+    first = cli._load_configuration(str(path))
+    assert len(list(configuration_cache.glob("*.json"))) == 1
+
+    def fail(path: str):
+        raise AssertionError("configuration file parsed again")
+
+    monkeypatch.setattr(cli, "_read_configuration", fail)
+    second = cli._load_configuration(str(path))
+
+    assert second == first
+    assert second.channel == "conda-forge"
+    assert second.requirements == {"python"}
+
+
+def test_load_configuration_parses_changed_file_again(
+    configuration_cache: Path, tmp_path: Path
+):
+    path = tmp_path / "config.yml"
+    path.write_text("channel: conda-forge\n")
+    assert cli._load_configuration(str(path)).channel == "conda-forge"
+
+    path.write_text("channel: other-channel\n")
+    assert cli._load_configuration(str(path)).channel == "other-channel"
+    assert len(list(configuration_cache.glob("*.json"))) == 2
+
+
+def test_load_configuration_cache_key_includes_known_settings(
+    configuration_cache: Path, tmp_path: Path, monkeypatch: pytest.MonkeyPatch
+):
+    path = tmp_path / "config.yml"
+    path.write_text("channel: conda-forge\n")
+    cli._load_configuration(str(path))
+
+    settings = dict(_CONFIGURATION_DEFAULTS, extra=None)
+    monkeypatch.setattr(cli, "_CONFIGURATION_DEFAULTS", settings)
+    cli._load_configuration(str(path))
+
+    assert len(list(configuration_cache.glob("*.json"))) == 2
+
+
+def test_load_configuration_without_writable_cache(
+    tmp_path: Path, monkeypatch: pytest.MonkeyPatch
+):
+    blocker = tmp_path / "blocker"
+    blocker.write_text("")  # a file where the cache directory should be
+    monkeypatch.setattr(cli, "_CONFIGURATION_CACHE", blocker / "configs")
+
+    path = tmp_path / "config.yml"
+    path.write_text("channel: conda-forge\n")
+
+    assert cli._load_configuration(str(path)).channel == "conda-forge"
+    assert cli._load_configuration(str(path)).channel == "conda-forge"
+
+
+def test_load_configuration_prunes_cache(
+    configuration_cache: Path, tmp_path: Path, monkeypatch: pytest.MonkeyPatch
+):
+    monkeypatch.setattr(cli, "_CONFIGURATION_CACHE_SIZE", 2)
+
+    for index in range(4):
+        path = tmp_path / f"config{index}.yml"
+        path.write_text(f"channel: channel{index}\n")
+        cli._load_configuration(str(path))
+
+    assert len(list(configuration_cache.glob("*.json"))) == 2
@@ -11,6 +11,7 @@ import pytest
 import yaml
 from click.testing import CliRunner
 
+from conda_replicate import CondaReplicateException
 from conda_replicate.cli import query
 from tests.utils import get_test_data_path
 from tests.utils import make_arguments
@@ -230,6 +231,92 @@ def test_query_selects_correct_subset_of_a_channel_with_configuration_file(
     assert actual == expected
 
 
+def test_query_selects_correct_subset_of_a_channel_with_json_configuration_file(
+    runner: CliRunner, lookup: QueryDataLookup, tmp_path: Path
+):
+    baseline_data = lookup.get("original")
+    subset_data = lookup.get("selected1")
+
+    configuration = tmp_path / "config.json"
+    configuration.write_text(
+        json.dumps(
+            {
+                "channel": baseline_data.path.as_uri(),
+                "requirements": subset_data.requirements,
+                "subdirs": subset_data.subdirs,
+            }
+        )
+    )
+
+    parameters = shlex.split(
+        f"""
+        --config {configuration.resolve().as_posix()}
+        --output json
+        --quiet
+        """
+    )
+
+    result = runner.invoke(query, parameters)
+    contents = json.loads(result.output, strict=False)
+    actual = set(record["fn"] for record in contents["add"])
+
+    expected = subset_data.get_package_filenames()
+
+    assert result.exit_code == 0
+    assert actual == expected
+
+
+def test_query_selects_correct_subset_of_a_channel_with_merge_keys_in_configuration(
+    runner: CliRunner, lookup: QueryDataLookup, tmp_path: Path
+):
+    baseline_data = lookup.get("original")
+    subset_data = lookup.get("selected1")
+
+    configuration = tmp_path / "config.yml"
+    configuration.write_text(
+        "\n".join(
+            [
+                f"requirements: &requirements {json.dumps(subset_data.requirements)}",
+                "base: &base",
+                f"  channel: {baseline_data.path.as_uri()}",
+                f"  subdirs: {json.dumps(subset_data.subdirs)}",
+                "<<: *base",
+            ]
+        )
+    )
+
+    parameters = shlex.split(
+        f"""
+        --config {configuration.resolve().as_posix()}
+        --output json
+        --quiet
+        """
+    )
+
+    result = runner.invoke(query, parameters)
+    contents = json.loads(result.output, strict=False)
+    actual = set(record["fn"] for record in contents["add"])
+
+    expected = subset_data.get_package_filenames()
+
+    assert result.exit_code == 0
+    assert actual == expected
+
+
+def test_query_reports_invalid_yaml_configuration_file(
+    runner: CliRunner, tmp_path: Path
+):
+    configuration = tmp_path / "config.yml"
+    configuration.write_text("requirements: [python\n")
+
+    parameters = shlex.split(f"--config {configuration.resolve().as_posix()}")
+
+    result = runner.invoke(query, parameters)
+
+    assert result.exit_code == 2
+    assert "Invalid yaml configuration file" in result.output
+
+
 @pytest.mark.parametrize(
     ("baseline", "target", "subset"),
     [
@@ -319,3 +406,34 @@ def test_query_selects_correct_subset_with_target_with_configuration_file(
 
     assert result.exit_code == 0
     assert actual == expected
+
+
+def test_query_reports_application_exceptions(runner: CliRunner, monkeypatch):
+    def run_query(*args, **kwargs):
+        raise CondaReplicateException("Something went wrong")
+
+    monkeypatch.setattr("conda_replicate.core.run_query", run_query)
+
+    result = runner.invoke(query, ["python", "--quiet"])
+
+    assert result.exit_code == 1
+    assert "ERROR: Something went wrong" in result.output
+
+
+def test_query_does_not_add_default_subdirs_to_configuration_file_subdirs(
+    runner: CliRunner, monkeypatch, tmp_path: Path
+):
+    captured = {}
+
+    def run_query(**kwargs):
+        captured.update(kwargs)
+
+    monkeypatch.setattr("conda_replicate.core.run_query", run_query)
+
+    configuration = tmp_path / "config.yml"
+    make_configuration_file(configuration, requirements=["python"], subdirs=["win-64"])
+
+    result = runner.invoke(query, ["--config", str(configuration), "--quiet"])
+
+    assert result.exit_code == 0
+    assert captured["subdirs"] == ("win-64",)
@@ -0,0 +1,21 @@
+import pytest
+
+from conda_replicate.group import groupby
+
+
+def test_groupby_preserves_item_order():
+    items = ["apple", "banana", "avocado", "blueberry", "cherry"]
+    groups = groupby(items, lambda item: item[0])
+    assert groups == {
+        "a": ["apple", "avocado"],
+        "b": ["banana", "blueberry"],
+        "c": ["cherry"],
+    }
+
+
+def test_groupby_missing_key_is_not_created():
+    groups = groupby([1, 2, 3], lambda item: item % 2)
+    assert type(groups) is dict  # not a defaultdict
+    with pytest.raises(KeyError):
+        groups[5]
+    assert 5 not in groups
@@ -2,13 +2,16 @@ from pathlib import Path
 from typing import Dict
 
 import pytest
+from conda.exports import PackageRecord
 
 from conda_replicate.adapters.channel import CondaChannel
 from conda_replicate.adapters.channel import LocalCondaChannel
 from conda_replicate.adapters.channel import RepoData
+from conda_replicate.adapters.package import CondaPackage
 from conda_replicate.resolve import Parameters
 from conda_replicate.resolve import Resolver
 from conda_replicate.resolve import UnsatisfiedRequirementsError
+from conda_replicate.resolve import _Graph
 
 
 def make_temp_local_channel(path: Path, packages: Dict) -> CondaChannel:
@@ -846,3 +849,86 @@ def test_package_resolution_for_invalid_queries(tmp_path, data):
         parameters = Parameters(requirements, exclusions, disposables, subdirs)
         resolver = Resolver(channel)
         _ = set(resolver.resolve(parameters))
+
+
+def make_package(name: str, extension: str = ".tar.bz2") -> CondaPackage:
+    """Returns a minimal conda package used as a graph node."""
+    record = PackageRecord(
+        name=name,
+        version="1.0",
+        build="0",
+        build_number=0,
+        subdir="noarch",
+        channel="test",
+        fn=f"{name}-1.0-0{extension}",
+    )
+    return CondaPackage(record)
+
+
+def make_graph() -> _Graph:
+    """Returns the graph: a -> a-pkg -> c <- b-pkg <- b, c -> c-pkg."""
+    packages = {name: make_package(name) for name in "abc"}
+    graph = _Graph()
+    graph.add_edge("a", packages["a"])
+    graph.add_edge("b", packages["b"])
+    graph.add_edge(packages["a"], "c")
+    graph.add_edge(packages["b"], "c")
+    graph.add_edge("c", packages["c"])
+    return graph
+
+
+def test_graph_classifies_nodes():
+    graph = make_graph()
+    assert graph.specs == {"a", "b", "c"}
+    assert graph.packages == {make_package(name) for name in "abc"}
+    assert len(graph) == 6
+    assert graph.number_of_edges == 5
+
+
+def test_graph_remove_node_returns_predecessors():
+    graph = make_graph()
+    parents = graph.remove_node("c")
+
+    assert parents == {make_package("a"), make_package("b")}
+    assert "c" not in graph
+    assert all(not graph.successors[parent] for parent in parents)
+    assert not graph.predecessors[make_package("c")]
+
+
+def test_graph_reachable_from_multiple_sources():
+    graph = make_graph()
+    graph.add_node("d")
+
+    assert graph.reachable(["a"]) == {"a", make_package("a"), "c", make_package("c")}
+    assert graph.reachable(["a", "b"]) == set(graph) - {"d"}
+    assert graph.reachable(["d", "c"]) == {"d", "c", make_package("c")}
+    assert graph.reachable([]) == set()
+
+
+def test_graph_specs_and_packages_are_consistent_after_removals():
+    graph = make_graph()
+    graph.remove_node(make_package("a"))
+    graph.remove_node("b")
+
+    assert graph.specs == {"a", "c"}
+    assert graph.packages == {make_package("b"), make_package("c")}
+    assert set(graph) == graph.specs | graph.packages
+    assert graph.reachable(["a"]) == {"a"}
+    assert graph.predecessors["c"] == {make_package("b")}
+    assert graph.number_of_edges == 2
+
+
+@pytest.mark.parametrize(
+    ("requirements", "exclusions"),
+    [([], ["a[fn=a-1.0-0.conda]"]), (["a[fn=a-1.0-0.tar.bz2]"], [])],
+    ids=["exclusion", "requirement"],
+)
+def test_parameters_constrain_equal_packages_by_filename(requirements, exclusions):
+    parameters = Parameters(requirements, exclusions, [], ["noarch"])
+    tarball = make_package("a", ".tar.bz2")
+    conda = make_package("a", ".conda")
+    assert tarball == conda  # same equality key, different files
+
+    assert not parameters.is_constrained(tarball)
+    assert parameters.is_constrained(conda)
+    assert not parameters.is_constrained(tarball)